@@ -0,0 +1,277 @@
+import os
+import sys
+import argparse
+import json
+import time
+
+# Adiciona o diretório raiz ao PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from src.services.detection_service import DetectionService
+from src.services.detector_service import ReplayDetector, PassthroughTracker
+from src.config.settings import STREAM_JPEG_QUALITY, DETECTOR_BACKEND, DETECTOR_PRECISION
+
+
+class VideoFileCapture:
+    def __init__(self, path):
+        """
+        Lê todos os frames de um arquivo de vídeo em sequência, sem descartar nenhum
+        O relógio é o tempo do próprio vídeo a partir da data do arquivo (execuções repetidas geram os mesmos eventos)
+        """
+        self.cap = cv2.VideoCapture(path)
+        self.clock_start = os.path.getmtime(path)
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def read_direct(self):
+        return self.cap.read()
+
+    def start(self):
+        """Sem thread: o benchmark lê os frames no ritmo do pipeline"""
+
+    def read(self, timeout=None):
+        ret, frame = self.cap.read()
+        return ret, frame, time.time(), self.clock_start + self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+
+    def get_stats(self):
+        return {}
+
+    def stop(self):
+        self.cap.release()
+
+
+class SyntheticCapture:
+    def __init__(self, width=1280, height=720, fps=25, frame_count=300, objects=5, seed=0):
+        """
+        Gera frames sintéticos com pessoas (retângulos) atravessando a área de interesse
+        Os boxes de cada frame são conhecidos e podem alimentar o ReplayDetector
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_count = frame_count
+        self.index = 0
+        self.clock_start = time.time()
+
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 80, (height, width, 3), dtype=np.uint8)
+        self.box_size = np.array([height * 0.12, height * 0.3])
+        self.start_x = rng.uniform(0, width - self.box_size[0], objects)
+        self.bottom_y = rng.uniform(height * 0.7, height * 0.95, objects)
+        self.speed_x = rng.uniform(2, 8, objects) * rng.choice([-1, 1], objects)
+
+    def boxes_at(self, index):
+        """Boxes (x1, y1, x2, y2, conf, cls, id) das pessoas no frame"""
+        span = self.width - self.box_size[0]
+        # Movimento de vai-e-volta entre as bordas do frame
+        x = np.abs((self.start_x + self.speed_x * index) % (2 * span) - span)
+        x1 = span - x
+        y2 = self.bottom_y
+        return [
+            [x1[i], y2[i] - self.box_size[1], x1[i] + self.box_size[0], y2[i], 0.9, 0, i + 1]
+            for i in range(len(x1))
+        ]
+
+    def is_opened(self):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.index = int(value)
+        return True
+
+    def read_direct(self):
+        if self.index >= self.frame_count:
+            return False, None
+        frame = self.background.copy()
+        for x1, y1, x2, y2, conf, cls, obj_id in self.boxes_at(self.index):
+            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (200, 200, 200), -1)
+        self.index += 1
+        return True, frame
+
+    def start(self):
+        """Sem thread: o benchmark lê os frames no ritmo do pipeline"""
+
+    def read(self, timeout=None):
+        ret, frame = self.read_direct()
+        # Relógio do frame: índice / fps (independe da velocidade do pipeline)
+        return ret, frame, time.time(), self.clock_start + (self.index - 1) / self.fps
+
+    def get_stats(self):
+        return {}
+
+    def stop(self):
+        """Nada a liberar"""
+
+
+def summarize(samples):
+    """Resume as latências de um estágio (em milissegundos)"""
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(values.max()),
+    }
+
+
+def run_benchmark(service, max_frames=None, recorded_frames=None):
+    """
+    Executa process_frame, draw_annotations e a codificação JPEG até acabar a fonte
+    recorded_frames: lista onde as detecções de cada frame são gravadas (opcional)
+    Retorna: relatório com frames/s e percentis de latência por estágio
+    """
+    encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), STREAM_JPEG_QUALITY]
+    stages = {"process_frame": [], "draw_annotations": [], "jpeg_encode": [], "total": []}
+    frames = 0
+    # Detector gravado: os boxes são reproduzidos pelo número do frame (um registro por frame lido)
+    seek = getattr(service.detector, "seek", None)
+
+    started_at = time.perf_counter()
+    while max_frames is None or frames < max_frames:
+        if seek is not None:
+            seek(frames)
+        t0 = time.perf_counter()
+        output = service.process_frame()
+        t1 = time.perf_counter()
+        if output is None:
+            break
+
+        frame, detections, now = output
+        annotated = service.draw_annotations(frame, detections, now)
+        t2 = time.perf_counter()
+        cv2.imencode('.jpg', annotated, encode_params)
+        t3 = time.perf_counter()
+
+        stages["process_frame"].append(t1 - t0)
+        stages["draw_annotations"].append(t2 - t1)
+        stages["jpeg_encode"].append(t3 - t2)
+        stages["total"].append(t3 - t0)
+        frames += 1
+
+        if recorded_frames is not None:
+            recorded_frames.append(
+                np.column_stack([detections.xyxy, detections.conf, detections.cls, detections.ids]).tolist()
+            )
+
+    elapsed = time.perf_counter() - started_at
+    return {
+        "frames": frames,
+        "elapsed_s": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "stages": {name: summarize(samples) for name, samples in stages.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GatekeeperX - Benchmark offline do pipeline')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--video', type=str, help='Arquivo de vídeo local usado como fonte')
+    source.add_argument('--synthetic', action='store_true', help='Usa frames sintéticos gerados em memória')
+    parser.add_argument('--width', type=int, default=1280, help='Largura dos frames sintéticos')
+    parser.add_argument('--height', type=int, default=720, help='Altura dos frames sintéticos')
+    parser.add_argument('--fps', type=float, default=25, help='FPS dos frames sintéticos')
+    parser.add_argument('--objects', type=int, default=5, help='Número de pessoas nos frames sintéticos')
+    parser.add_argument('--frames', type=int, help='Número máximo de frames processados (padrão: 300 sintéticos ou o vídeo inteiro)')
+    parser.add_argument('--detector', choices=['stub', 'yolo'], default='stub', help='stub repete boxes gravados; yolo roda o modelo real no backend configurado (DETECTOR_BACKEND)')
+    parser.add_argument('--backend', choices=['ultralytics', 'onnxruntime', 'openvino'], default=DETECTOR_BACKEND, help='Motor de inferência do detector yolo')
+    parser.add_argument('--precision', choices=['fp32', 'int8'], default=DETECTOR_PRECISION, help='Precisão do modelo do detector yolo')
+    parser.add_argument('--boxes', type=str, help='Arquivo JSON com boxes gravados para o detector stub')
+    parser.add_argument('--record-boxes', type=str, help='Grava os boxes detectados em JSON para repetir depois com --boxes')
+    parser.add_argument('--roi', action='store_true', help='Roda o detector yolo só no recorte da área de interesse (ROI_INFERENCE_ENABLED)')
+    parser.add_argument('--disable-motion-gate', action='store_true', help='Desativa o filtro de movimento')
+    parser.add_argument('--disable-clips', action='store_true', help='Desativa o buffer e a gravação dos clipes de alerta')
+    parser.add_argument('--output', type=str, help='Arquivo onde o relatório JSON é salvo (padrão: stdout)')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        max_frames = args.frames or 300
+        capture = SyntheticCapture(args.width, args.height, args.fps, max_frames, args.objects)
+    else:
+        max_frames = args.frames
+        capture = VideoFileCapture(args.video)
+
+    tracker = None
+    if args.detector == 'yolo':
+        from src.services.detector_service import create_detector
+        detector = create_detector(args.backend, args.precision)
+    elif args.boxes:
+        detector = ReplayDetector.from_file(args.boxes)
+        tracker = PassthroughTracker()
+    elif args.synthetic:
+        detector = ReplayDetector([capture.boxes_at(i) for i in range(max_frames)], {0: "person"})
+        tracker = PassthroughTracker()
+    else:
+        parser.error('o detector stub precisa de --boxes quando a fonte é um vídeo')
+
+    service = DetectionService(
+        camera_ip=args.video or "synthetic",
+        detector=detector,
+        camera_id="benchmark",
+        capture=capture,
+        tracker=tracker,
+        calibrate_depth=False
+    )
+    if args.disable_motion_gate:
+        service.motion_gate = None
+    if args.disable_clips and service.clip_recorder is not None:
+        service.clip_recorder.stop()
+        service.clip_recorder = None
+    # Os boxes gravados já estão em coordenadas do frame inteiro: o recorte só vale para o yolo
+    service.roi_enabled = args.detector == 'yolo' and (args.roi or service.roi_enabled)
+    # Pelo mesmo motivo, o frame não é reduzido para o stub (os boxes não voltariam a ser reescalados)
+    if args.detector != 'yolo':
+        service.input_size = None
+
+    recorded_frames = [] if args.record_boxes else None
+    try:
+        report = run_benchmark(service, max_frames, recorded_frames)
+    finally:
+        service.cleanup()
+
+    report["config"] = {
+        "source": args.video or "synthetic",
+        "detector": args.detector,
+        "backend": args.backend if args.detector == 'yolo' else None,
+        "precision": args.precision if args.detector == 'yolo' else None,
+        "boxes": args.boxes,
+        "motion_gate": service.motion_gate is not None,
+        "clips": service.clip_recorder is not None,
+        "roi": service.roi_enabled,
+        "width": args.width if args.synthetic else None,
+        "height": args.height if args.synthetic else None,
+    }
+
+    if args.record_boxes:
+        with open(args.record_boxes, 'w') as f:
+            json.dump({"names": detector.names, "frames": recorded_frames}, f)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
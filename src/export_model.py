@@ -0,0 +1,117 @@
+import os
+import sys
+import argparse
+import shutil
+
+# Adiciona o diretório raiz ao PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from src.services.detector_service import exported_model_path, letterbox
+from src.config.settings import DETECTOR_MODEL, DETECTOR_INPUT_SIZE
+
+
+def read_calibration_frames(source, count, size):
+    """
+    Lê frames de um vídeo (ou de uma pasta de imagens) para calibrar a quantização INT8
+    Retorna: lista de blobs (1, 3, size, size) no mesmo formato usado pelo detector
+    """
+    if os.path.isdir(source):
+        paths = sorted(os.path.join(source, name) for name in os.listdir(source))
+        frames = (cv2.imread(path) for path in paths)
+    else:
+        cap = cv2.VideoCapture(source)
+        frames = iter(lambda: cap.read()[1], None)
+
+    blobs = []
+    for frame in frames:
+        if frame is None:
+            continue
+        image, _, _ = letterbox(frame, size)
+        blobs.append(cv2.dnn.blobFromImage(image, 1 / 255.0, swapRB=True))
+        if len(blobs) >= count:
+            break
+    if not blobs:
+        raise ValueError(f"Nenhum frame de calibração encontrado em {source}")
+    return blobs
+
+
+def move_export(exported, target):
+    """Move o arquivo/pasta gerado pelo ultralytics para o caminho esperado pelo detector"""
+    exported = str(exported)
+    if os.path.abspath(exported) == os.path.abspath(target):
+        return
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
+    shutil.move(exported, target)
+
+
+def export_onnx(model, imgsz, int8, calibration, calibration_frames):
+    fp32_path = exported_model_path("onnxruntime", "fp32", DETECTOR_MODEL)
+    # Sempre reexporta: um fp32 existente pode ter outro --imgsz e a calibração usaria o tamanho errado
+    move_export(model.export(format="onnx", imgsz=imgsz), fp32_path)
+    if not int8:
+        return fp32_path
+
+    # Quantização estática: pesos e ativações em INT8, calibrados com frames da própria câmera
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self, input_name, blobs):
+            self.inputs = iter({input_name: blob} for blob in blobs)
+
+        def get_next(self):
+            return next(self.inputs, None)
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    target = exported_model_path("onnxruntime", "int8", DETECTOR_MODEL)
+    quantize_static(
+        fp32_path,
+        target,
+        FrameReader(input_name, read_calibration_frames(calibration, calibration_frames, imgsz)),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+    return target
+
+
+def export_openvino(model, imgsz, int8, data):
+    # O ultralytics calibra o INT8 com o NNCF usando o dataset informado
+    options = {"int8": True, "data": data} if int8 else {}
+    target = exported_model_path("openvino", "int8" if int8 else "fp32", DETECTOR_MODEL)
+    move_export(model.export(format="openvino", imgsz=imgsz, **options), target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GatekeeperX - Exporta o modelo YOLO para ONNX Runtime ou OpenVINO')
+    parser.add_argument('--backend', choices=['onnxruntime', 'openvino'], required=True, help='Backend de destino')
+    parser.add_argument('--int8', action='store_true', help='Gera o modelo quantizado em INT8')
+    parser.add_argument('--imgsz', type=int, default=DETECTOR_INPUT_SIZE, help='Tamanho da entrada do modelo exportado (use o mesmo DETECTOR_INPUT_SIZE)')
+    parser.add_argument('--calibration', type=str, help='Vídeo ou pasta de imagens usados na calibração INT8 do ONNX Runtime')
+    parser.add_argument('--calibration-frames', type=int, default=100, help='Número de frames usados na calibração INT8')
+    parser.add_argument('--data', type=str, default='coco8.yaml', help='Dataset usado na calibração INT8 do OpenVINO')
+    args = parser.parse_args()
+
+    if args.backend == 'onnxruntime' and args.int8 and not args.calibration:
+        parser.error('a quantização INT8 do ONNX Runtime precisa de --calibration')
+
+    from ultralytics import YOLO
+    model = YOLO(DETECTOR_MODEL)
+
+    if args.backend == 'onnxruntime':
+        path = export_onnx(model, args.imgsz, args.int8, args.calibration, args.calibration_frames)
+    else:
+        path = export_openvino(model, args.imgsz, args.int8, args.data)
+
+    print(f"Modelo exportado em: {path}")
+    print(f"Use DETECTOR_BACKEND = \"{args.backend}\" e DETECTOR_PRECISION = \"{'int8' if args.int8 else 'fp32'}\" em src/config/settings.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,18 @@
 import cv2
 from src.services.detection_service import DetectionService
+from src.utils.helpers import reset_log_file
 
 def main():
+    reset_log_file()
     detection_service = DetectionService()
     
     try:
         while True:
-            frame, results, now = detection_service.process_frame()
+            frame, detections, now = detection_service.process_frame()
             if frame is None:
                 break
                 
-            annotated = detection_service.draw_annotations(frame, results, now)
+            annotated = detection_service.draw_annotations(frame, detections, now)
             cv2.imshow("GatekeeperX", annotated)
             
             if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -1,78 +1,174 @@
 import os
 import sys
 import argparse
+import queue
+import threading
 
 # Adiciona o diretório raiz ao PYTHONPATH
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import cv2
-import threading
-from flask import Flask, Response
-from src.services.detection_service import DetectionService
+from src.utils.startup_timer import StartupTimer
+startup_timer = StartupTimer()
+
+from datetime import datetime
+from flask import Flask, Response, abort, jsonify, request
+from markupsafe import escape
+from src.config.settings import (
+    CAMERAS, DUAL_STREAM_ENABLED, DETECTION_STREAM, DISPLAY_STREAM, PIPELINE_MODE,
+    LOG_FILE, LOG_TAIL_MAX_LINES, LOG_STREAM_KEEPALIVE
+)
+from src.utils.helpers import reset_log_file, get_event_store, get_log_writer
+from src.utils.log_tail import read_lines_from, read_last_lines
+from src.services.event_store import parse_cursor
+from src.utils.metrics import metrics
 
 app = Flask(__name__)
-last_frame = None  # Variável global para armazenar o último frame processado
+camera_manager = None  # Gerenciador das câmeras (criado em segundo plano pelo warm_up)
+startup_error = None  # Erro ocorrido durante o aquecimento, se houver
 
 # Configuração do parser de argumentos
 parser = argparse.ArgumentParser(description='GatekeeperX - Sistema de detecção inteligente')
-parser.add_argument('--camera-ip', type=str, help='IP da câmera (ex: 192.168.0.100)')
+parser.add_argument('--camera-ip', type=str, action='append', help='IP da câmera (ex: 192.168.0.100). Pode ser repetido para várias câmeras')
 parser.add_argument('--username', type=str, default='Dannark', help='Usuário da câmera (padrão: Dannark)')
 parser.add_argument('--password', type=str, default='23021994', help='Senha da câmera (padrão: 23021994)')
+parser.add_argument('--dual-stream', action='store_true', help='Detecta no sub-stream e exibe o stream principal (decodificado só com clientes assistindo)')
+parser.add_argument('--recalibrate-depth', action='store_true', help='Ignora a calibração de profundidade salva e roda o MiDaS novamente (use quando a câmera mudar de posição)')
 args = parser.parse_args()
 
-# IP padrão da câmera
-DEFAULT_CAMERA_IP = "192.168.0.100"
-
-def build_rtsp_url(ip, username=None, password=None):
-    """Constrói a URL RTSP a partir do IP e credenciais"""
+def build_rtsp_url(ip, username=None, password=None, stream=DISPLAY_STREAM):
+    """Constrói a URL RTSP a partir do IP, credenciais e stream (stream1 = principal, stream2 = sub-stream)"""
     if username and password:
-        return f"rtsp://{username}:{password}@{ip}:554/stream1"
-    return f"rtsp://{ip}:554/stream1"
-
-def processing_loop():
-    global last_frame
-    # Usa o IP fornecido via argumento ou o IP padrão
-    camera_ip = args.camera_ip if args.camera_ip else DEFAULT_CAMERA_IP
-    rtsp_url = build_rtsp_url(camera_ip, args.username, args.password)
-    print(f"Conectando à câmera em: {rtsp_url}")
-    
+        return f"rtsp://{username}:{password}@{ip}:554/{stream}"
+    return f"rtsp://{ip}:554/{stream}"
+
+def build_camera_configs():
+    """Monta a lista de câmeras a partir dos argumentos ou das configurações"""
+    if args.camera_ip:
+        cameras = [{"id": str(i), "ip": ip} for i, ip in enumerate(args.camera_ip)]
+    else:
+        cameras = CAMERAS
+
+    configs = []
+    for camera in cameras:
+        config = dict(camera)
+        username = camera.get("username", args.username)
+        password = camera.get("password", args.password)
+        config["url"] = build_rtsp_url(camera["ip"], username, password)
+        if camera.get("dual_stream", DUAL_STREAM_ENABLED or args.dual_stream):
+            # Detecção no sub-stream; o stream principal só é aberto para exibição
+            config["display_url"] = config["url"]
+            config["url"] = build_rtsp_url(camera["ip"], username, password, DETECTION_STREAM)
+        config["recalibrate_depth"] = args.recalibrate_depth
+        configs.append(config)
+    return configs
+
+def warm_up():
+    """
+    Aquecimento em segundo plano: importa o pipeline, carrega o modelo e inicia as câmeras
+    O servidor HTTP já responde (com "warming up") enquanto isso acontece
+    """
+    global camera_manager, startup_error
     try:
-        detection_service = DetectionService(camera_ip=rtsp_url)
-        while True:
-            frame, results, now = detection_service.process_frame()
-            if frame is None:
-                print("Erro ao processar frame. Tentando reconectar...")
-                break
-            annotated = detection_service.draw_annotations(frame, results, now)
-            last_frame = annotated  # Atualiza o frame global
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+        with startup_timer.phase("imports"):
+            from src.services.camera_manager import CameraManager
+            from src.services.detector_service import create_detector
+
+        with startup_timer.phase("model_load"):
+            if PIPELINE_MODE == "processes":
+                # Modelo carregado em um processo próprio, fora do GIL do pipeline
+                from src.services.process_pipeline import ProcessDetector
+                detector = ProcessDetector()
+            else:
+                detector = create_detector()
+
+        with startup_timer.phase("model_warmup"):
+            detector.warm_up()
+
+        with startup_timer.phase("cameras_start"):
+            manager = CameraManager(build_camera_configs(), detector)
+            manager.start()
+
+        camera_manager = manager
+        startup_timer.mark("ready")
     except Exception as e:
-        print(f"Erro ao conectar com a câmera: {str(e)}")
-        print("Verifique se:")
-        print("1. O IP está correto")
-        print("2. A câmera está ligada e conectada à rede")
-        print("3. A porta 554 está aberta")
-        print("4. O usuário e senha da câmera estão corretos (se necessário)")
-    finally:
-        if 'detection_service' in locals():
-            detection_service.cleanup()
-
-def gen_frames():
-    global last_frame
-    while True:
-        if last_frame is not None:
-            ret, buffer = cv2.imencode('.jpg', last_frame)
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+        startup_error = str(e)
+        print(f"Erro durante a inicialização: {startup_error}")
+    print(startup_timer.format_report())
+
+def warming_up_response():
+    """Resposta enquanto o pipeline ainda não está pronto"""
+    message = f"Erro na inicialização: {startup_error}" if startup_error else "warming up"
+    return Response(
+        f"<html><head><meta http-equiv='refresh' content='2'></head>"
+        f"<body style='background:#222;color:#fff;text-align:center;'><h1>{message}</h1></body></html>",
+        status=503
+    )
+
+@app.route('/status')
+def status():
+    cameras = {}
+    if camera_manager is not None:
+        cameras = {camera_id: camera_manager.get(camera_id).status for camera_id in camera_manager.camera_ids()}
+    state = "ready" if camera_manager is not None else ("error" if startup_error else "warming up")
+    return jsonify({
+        "status": state,
+        "error": startup_error,
+        "cameras": cameras,
+        "startup": startup_timer.report(),
+    }), 200 if state == "ready" else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Formato texto do Prometheus (disponível também durante o aquecimento)
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+def tripwire_counts(pipeline):
+    # Contadores de passagem da câmera (vazio enquanto a câmera conecta)
+    service = pipeline.detection_service
+    return service.get_tripwire_counts() if service is not None else []
+
+@app.route('/tripwires')
+def tripwires():
+    if camera_manager is None:
+        return warming_up_response()
+    return jsonify({
+        camera_id: tripwire_counts(camera_manager.get(camera_id))
+        for camera_id in camera_manager.camera_ids()
+    })
+
+@app.route('/camera/<camera_id>/tripwires')
+def camera_tripwires(camera_id):
+    if camera_manager is None:
+        return warming_up_response()
+    pipeline = camera_manager.get(camera_id)
+    if pipeline is None:
+        abort(404)
+    return jsonify(tripwire_counts(pipeline))
+
+@app.route('/camera/<camera_id>/video_feed')
+def camera_video_feed(camera_id):
+    if camera_manager is None:
+        return warming_up_response()
+    pipeline = camera_manager.get(camera_id)
+    if pipeline is None:
+        abort(404)
+    return Response(pipeline.broadcaster.stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(gen_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    if camera_manager is None:
+        return warming_up_response()
+    # Mantém a rota antiga apontando para a primeira câmera
+    return camera_video_feed(camera_manager.camera_ids()[0])
 
 @app.route('/')
 def index():
+    if camera_manager is None:
+        return warming_up_response()
+    images = "".join(
+        f"<img src='/camera/{camera_id}/video_feed' alt='Câmera {camera_id}'>"
+        for camera_id in camera_manager.camera_ids()
+    )
     return """
     <html>
     <head>
@@ -81,9 +177,11 @@ def index():
             body { background: #222; color: #fff; text-align: center; }
             .video-container {
                 display: flex;
+                flex-wrap: wrap;
+                gap: 16px;
                 justify-content: center;
                 align-items: center;
-                height: 100vh;
+                min-height: 100vh;
             }
             img {
                 width: 100%;
@@ -99,24 +197,124 @@ def index():
     <body>
         <h1>Stream de vídeo</h1>
         <div class="video-container">
-            <img src='/video_feed' alt='Stream de vídeo'>
+            {images}
         </div>
     </body>
     </html>
-    """
+    """.replace("{images}", images)
+
+def parse_time(value):
+    """Converte um parâmetro de tempo (timestamp unix ou ISO 8601) em timestamp"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def event_filters():
+    """Filtros comuns das rotas de eventos (?start=&end=&camera_id=...)"""
+    try:
+        return {
+            "start": parse_time(request.args.get('start')),
+            "end": parse_time(request.args.get('end')),
+            "camera_id": request.args.get('camera_id'),
+        }
+    except ValueError:
+        abort(400, "start/end devem ser timestamp unix ou data ISO 8601")
+
+@app.route('/events')
+def events():
+    # Ex: /events?start=2024-05-01T00:00&label=person&limit=50&cursor=<next_cursor>
+    store = get_event_store()
+    if store is None:
+        abort(404)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            parse_cursor(cursor)
+        except ValueError:
+            abort(400, "cursor deve ser o next_cursor de uma página anterior (ts:id)")
+    return jsonify(store.query(
+        event=request.args.get('event'),
+        label=request.args.get('label'),
+        track_id=request.args.get('track_id', type=int),
+        limit=request.args.get('limit', 100, type=int),
+        cursor=cursor,
+        **event_filters()
+    ))
+
+@app.route('/events/stats')
+def events_stats():
+    store = get_event_store()
+    if store is None:
+        abort(404)
+    return jsonify(store.stats(**event_filters()))
 
 @app.route('/logs')
 def logs():
-    log_path = 'gatekeeperx.log'
-    if os.path.exists(log_path):
-        with open(log_path, 'r') as f:
-            content = f.read()
-        return f"<pre style='background:#111;color:#0f0;padding:16px;'>{content}</pre>"
+    # Mostra só as últimas linhas e acompanha os novos alertas pelo /logs/stream
+    if not os.path.exists(LOG_FILE):
+        return "<pre style='color:red'>Nenhum log encontrado.</pre>"
+    lines, offset = read_last_lines(LOG_FILE, 200)
+    content = escape("\n".join(lines))
+    return f"""
+    <pre id='logs' style='background:#111;color:#0f0;padding:16px;'>{content}</pre>
+    <script>
+        const logs = document.getElementById('logs');
+        const source = new EventSource('/logs/stream?offset={offset}');
+        source.onmessage = (e) => {{ logs.textContent += '\\n' + e.data; }};
+    </script>
+    """
+
+@app.route('/logs/tail')
+def logs_tail():
+    # Ex: /logs/tail?offset=1024&limit=100 (sem offset: últimas linhas do arquivo)
+    limit = max(0, min(request.args.get('limit', 100, type=int), LOG_TAIL_MAX_LINES))
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        lines, offset = read_last_lines(LOG_FILE, limit)
     else:
-        return "<pre style='color:red'>Nenhum log encontrado.</pre>" 
+        lines, offset = read_lines_from(LOG_FILE, max(0, offset), limit)
+    # O offset devolvido é o valor a usar na próxima chamada
+    return jsonify({"lines": lines, "offset": offset})
+
+@app.route('/logs/stream')
+def logs_stream():
+    # Server-sent events: cada alerta gravado é enviado com o offset do arquivo como id
+    # Ao reconectar, o navegador envia o Last-Event-ID e as linhas perdidas são reenviadas
+    offset = request.headers.get('Last-Event-ID', type=int)
+    if offset is None:
+        offset = request.args.get('offset', type=int)
+    writer = get_log_writer()
+
+    def generate():
+        listener = writer.subscribe()
+        try:
+            last_offset = offset
+            if last_offset is not None:
+                lines, last_offset = read_lines_from(LOG_FILE, last_offset, LOG_TAIL_MAX_LINES)
+                for i, line in enumerate(lines):
+                    event_id = f"id: {last_offset}\n" if i == len(lines) - 1 else ""
+                    yield f"{event_id}data: {line}\n\n"
+
+            while True:
+                try:
+                    line_offset, line = listener.get(timeout=LOG_STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                # Já enviada junto com as linhas anteriores ao offset
+                if last_offset is not None and line_offset <= last_offset:
+                    continue
+                yield f"id: {line_offset}\ndata: {line}\n\n"
+        finally:
+            writer.unsubscribe(listener)
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 if __name__ == "__main__":
-    t = threading.Thread(target=processing_loop)
-    t.daemon = True
-    t.start()
+    reset_log_file()
+    threading.Thread(target=warm_up, daemon=True).start()
+    startup_timer.mark("http_server")
     app.run(host='0.0.0.0', port=5050, debug=False)
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class Detections:
+    def __init__(self, xyxy=None, conf=None, cls=None, ids=None):
+        """
+        Detecções de um frame em arrays NumPy contíguos
+        xyxy: array (n, 4) com os boxes em pixels
+        conf: array (n,) com a confiança de cada detecção
+        cls: array (n,) com a classe de cada detecção
+        ids: array (n,) com o ID do tracking (-1 quando o box não tem ID)
+        """
+        self.xyxy = np.ascontiguousarray(np.asarray(xyxy if xyxy is not None else [], dtype=np.float32).reshape(-1, 4))
+        count = len(self.xyxy)
+        self.conf = np.ascontiguousarray(np.asarray(conf if conf is not None else np.zeros(count), dtype=np.float32).reshape(-1))
+        self.cls = np.ascontiguousarray(np.asarray(cls if cls is not None else np.zeros(count), dtype=np.int64).reshape(-1))
+        self.ids = np.ascontiguousarray(np.asarray(ids if ids is not None else np.full(count, -1), dtype=np.int64).reshape(-1))
+
+    @classmethod
+    def from_result(cls, result):
+        """Converte o Results do ultralytics em arrays, uma única vez por frame"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls()
+
+        data = boxes.data.cpu().numpy()
+        ids = data[:, 4] if boxes.is_track else None
+        return cls(data[:, :4], data[:, -2], data[:, -1], ids)
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def __getitem__(self, index):
+        """Seleciona um subconjunto das detecções (máscara booleana ou índices)"""
+        return Detections(self.xyxy[index], self.conf[index], self.cls[index], self.ids[index])
+
+    def offset(self, dx, dy, scale=1.0):
+        """
+        Escala e desloca os boxes (ex: da imagem reduzida/recortada para o frame inteiro)
+        Retorna: Detections com xyxy * scale + (dx, dy)
+        """
+        xyxy = self.xyxy * np.float32(scale) + np.array([dx, dy, dx, dy], dtype=np.float32)
+        return Detections(xyxy, self.conf, self.cls, self.ids)
+
+    def rescale(self, sx, sy):
+        """Converte os boxes para outra resolução (ex: do sub-stream para o stream principal)"""
+        xyxy = self.xyxy * np.array([sx, sy, sx, sy], dtype=np.float32)
+        return Detections(xyxy, self.conf, self.cls, self.ids)
+
+    @property
+    def xywh(self):
+        """Boxes no formato (centro x, centro y, largura, altura)"""
+        xywh = np.empty_like(self.xyxy)
+        xywh[:, 0] = (self.xyxy[:, 0] + self.xyxy[:, 2]) / 2
+        xywh[:, 1] = (self.xyxy[:, 1] + self.xyxy[:, 3]) / 2
+        xywh[:, 2] = self.xyxy[:, 2] - self.xyxy[:, 0]
+        xywh[:, 3] = self.xyxy[:, 3] - self.xyxy[:, 1]
+        return xywh
+
+    def reference_points(self, person_class):
+        """
+        Calcula o ponto de referência de cada objeto
+        Para pessoas, usa um ponto 10% acima dos pés
+        Para outros objetos, usa o centro do retângulo
+        Retorna: array (n, 2)
+        """
+        x1, y1, x2, y2 = self.xyxy.T.astype(np.float64)
+        center_x = (x1 + x2) / 2
+        center_y = np.where(self.cls == person_class, y2 - (y2 - y1) * 0.1, (y1 + y2) / 2)
+        return np.stack([center_x, center_y], axis=1)
+
+    def area_overlap(self, area_box, min_ratio=0.1):
+        """
+        Verifica quais objetos estão dentro da área de interesse
+        Considera dentro quando a interseção cobre mais que min_ratio do box
+        Retorna: array booleano (n,)
+        """
+        x1, y1, x2, y2 = self.xyxy.T
+        inter_w = np.maximum(0, np.minimum(x2, area_box[2]) - np.maximum(x1, area_box[0]))
+        inter_h = np.maximum(0, np.minimum(y2, area_box[3]) - np.maximum(y1, area_box[1]))
+        box_area = (x2 - x1) * (y2 - y1)
+        return inter_w * inter_h > min_ratio * box_area
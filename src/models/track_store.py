@@ -0,0 +1,320 @@
+from datetime import datetime
+import numpy as np
+from src.models.tracked_object import TrackedObject
+from src.config.settings import (
+    SPEED_HISTORY_SIZE,
+    TRAJECTORY_HISTORY_SIZE,
+    MIN_SPEED_THRESHOLD,
+    MAX_SPEED_THRESHOLD,
+    SPEED_CALIBRATION,
+    FRAME_HEIGHT,
+    LOOK_AT_ANGLE_THRESHOLD,
+    LOOK_AT_DISTANCE_THRESHOLD,
+    LOOK_AT_FRAMES,
+    ENTRANCE_LINE_START_X,
+    ENTRANCE_LINE_START_Y,
+    ENTRANCE_LINE_END_X,
+    ENTRANCE_LINE_END_Y,
+    INTEREST_SCORE_THRESHOLD,
+    INTEREST_SCORE_LOOK_AT,
+    INTEREST_SCORE_STANDING,
+    INTEREST_SCORE_DECAY,
+    INTEREST_DISTANCE_THRESHOLD,
+    INTEREST_SPEED_THRESHOLD,
+    TRACK_STORE_INITIAL_CAPACITY
+)
+
+
+class TrackStore:
+    # Arrays por objeto: nome -> (formato extra, tipo, valor inicial)
+    FIELDS = {
+        "active": ((), bool, False),
+        "is_person": ((), bool, False),
+        "last_position": ((2,), np.float64, 0.0),
+        "last_speed": ((), np.float64, 0.0),
+        "last_depth": ((), np.float64, 0.0),
+        "last_speed_update": ((), np.float64, 0.0),
+        "speed_history": ((SPEED_HISTORY_SIZE,), np.float64, 0.0),
+        "speed_count": ((), np.int64, 0),
+        "position_history": ((TRAJECTORY_HISTORY_SIZE, 2), np.float64, 0.0),
+        "position_count": ((), np.int64, 0),
+        "direction": ((2,), np.float64, 0.0),
+        "smoothed_direction": ((2,), np.float64, 0.0),
+        "movement_angle": ((), np.float64, 0.0),
+        "direction_history": ((TRAJECTORY_HISTORY_SIZE, 2), np.float64, 0.0),
+        "direction_count": ((), np.int64, 0),
+        "look_at_history": ((LOOK_AT_FRAMES,), bool, False),
+        "look_at_count": ((), np.int64, 0),
+        "is_looking_at": ((), bool, False),
+        "interest_score": ((), np.float64, 0.0),
+        "is_interested": ((), bool, False),
+        "interest_start_time": ((), np.float64, np.nan),
+        "has_logged_interest": ((), bool, False),
+        "last_distance": ((), np.float64, 1.0),
+        "zone_bits": ((), np.uint64, 0),
+        "crossing_position": ((2,), np.float64, 0.0),
+    }
+
+    def __init__(self, entrance_line=None, capacity=TRACK_STORE_INITIAL_CAPACITY):
+        """
+        Armazena o estado de todos os objetos rastreados em arrays NumPy pré-alocados
+        Velocidade, direção, olhar e interesse são atualizados para todos os objetos
+        de uma vez por frame, com operações vetorizadas
+        entrance_line: linha de entrada ((x_inicial, y_inicial), (x_final, y_final)) em percentual
+        """
+        self.entrance_line = entrance_line or (
+            (ENTRANCE_LINE_START_X, ENTRANCE_LINE_START_Y),
+            (ENTRANCE_LINE_END_X, ENTRANCE_LINE_END_Y)
+        )
+        self.entrance_size = None
+        self.entrance_points = None
+        self.capacity = 0
+        self.free_slots = []
+        self._grow(max(1, capacity))
+
+    def _grow(self, capacity):
+        """Aumenta a capacidade dos arrays preservando os dados existentes"""
+        for name, (shape, dtype, initial) in self.FIELDS.items():
+            array = np.full((capacity,) + shape, initial, dtype=dtype)
+            if self.capacity:
+                array[:self.capacity] = getattr(self, name)
+            setattr(self, name, array)
+        self.free_slots.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def _reset_slot(self, slot):
+        """Volta o slot para os valores iniciais"""
+        for name, (shape, dtype, initial) in self.FIELDS.items():
+            getattr(self, name)[slot] = initial
+
+    def create_track(self, obj_id, label, position, now):
+        """
+        Registra um novo objeto e retorna sua visão (TrackedObject)
+        now: timestamp em segundos
+        """
+        if not self.free_slots:
+            self._grow(self.capacity * 2)
+        slot = self.free_slots.pop()
+        self._reset_slot(slot)
+
+        self.active[slot] = True
+        self.is_person[slot] = label == "person"
+        self.last_position[slot] = position
+        self.last_speed_update[slot] = now
+        self.position_history[slot, 0] = position
+        self.position_count[slot] = 1
+        self.crossing_position[slot] = position
+        return TrackedObject(obj_id, label, self, slot, datetime.fromtimestamp(now))
+
+    def update_zones(self, slots, zone_bits):
+        """
+        Guarda as zonas atuais dos objetos vistos no frame
+        Retorna: as zonas anteriores de cada objeto (para detectar entradas e saídas)
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        previous = self.zone_bits[slots].copy()
+        self.zone_bits[slots] = zone_bits
+        return previous
+
+    def update_crossing_positions(self, slots, positions):
+        """
+        Guarda a posição atual usada no teste das linhas de passagem
+        Retorna: as posições anteriores (início do deslocamento de cada objeto)
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        previous = self.crossing_position[slots].copy()
+        self.crossing_position[slots] = positions
+        return previous
+
+    def release(self, slot):
+        """Libera o slot de um objeto que saiu da cena"""
+        self.active[slot] = False
+        self.free_slots.append(slot)
+
+    def update(self, slots, positions, depths, now, frame_width, frame_height, min_time_diff):
+        """
+        Atualiza velocidade, trajetória, olhar e interesse de todos os objetos vistos no frame
+        slots: slots dos objetos já existentes detectados no frame
+        positions: array (n, 2) com o ponto de referência de cada objeto
+        depths: array (n,) com a profundidade (0-1) de cada objeto
+        now: timestamp em segundos
+        min_time_diff: intervalo mínimo em segundos entre atualizações de velocidade
+        Retorna: (should_log, interest_ended)
+                 should_log: array booleano (n,) indicando quais objetos devem registrar interesse no log
+                 interest_ended: array (n,) com a duração em segundos do interesse encerrado neste frame
+                                 (NaN para quem não encerrou)
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        should_log = np.zeros(len(slots), dtype=bool)
+        interest_ended = np.full(len(slots), np.nan)
+        if len(slots) == 0:
+            return should_log, interest_ended
+
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        depths = np.asarray(depths, dtype=np.float64)
+
+        self._update_speed(slots, positions, depths, now, frame_height, min_time_diff)
+        self._update_trajectory(slots, positions)
+
+        persons = self.is_person[slots]
+        if persons.any():
+            should_log[persons], interest_ended[persons] = self._update_interest_score(
+                slots[persons], now, frame_width, frame_height
+            )
+        return should_log, interest_ended
+
+    def _update_speed(self, slots, positions, depths, now, frame_height, min_time_diff):
+        """
+        Atualiza a velocidade considerando a profundidade
+        O deslocamento é convertido para a altura de referência (FRAME_HEIGHT), então a
+        velocidade não muda com a resolução da câmera
+        """
+        time_diff = now - self.last_speed_update[slots]
+        # Tolerância: com timestamps de época, now - anterior pode ficar um pouco abaixo de 1/fps
+        mask = time_diff >= min_time_diff - 1e-6
+        if not mask.any():
+            return
+
+        slots = slots[mask]
+        positions = positions[mask]
+        depths = depths[mask]
+        time_diff = time_diff[mask]
+
+        distance = np.hypot(*(positions - self.last_position[slots]).T)
+        speed_pixels = np.divide(distance, time_diff, out=np.zeros_like(distance), where=time_diff > 0)
+        speed_pixels *= FRAME_HEIGHT / frame_height
+
+        # Quanto menor a profundidade (mais próximo), maior a redução
+        depth_factor = 0.3 + (depths * 0.7)
+        speed_kmh = (speed_pixels * depth_factor / 100) * SPEED_CALIBRATION
+
+        # Aplica limites de velocidade
+        speed_kmh = np.where(speed_kmh < MIN_SPEED_THRESHOLD, 0.0, np.minimum(speed_kmh, MAX_SPEED_THRESHOLD))
+
+        # Atualiza o histórico circular e calcula a média
+        self.speed_history[slots, self.speed_count[slots] % SPEED_HISTORY_SIZE] = speed_kmh
+        self.speed_count[slots] += 1
+        samples = np.minimum(self.speed_count[slots], SPEED_HISTORY_SIZE)
+        self.last_speed[slots] = self.speed_history[slots].sum(axis=1) / samples
+
+        self.last_position[slots] = positions
+        self.last_depth[slots] = depths
+        self.last_speed_update[slots] = now
+
+    def _update_trajectory(self, slots, positions):
+        """Atualiza a trajetória e calcula a direção do movimento"""
+        previous = self.position_history[slots, (self.position_count[slots] - 1) % TRAJECTORY_HISTORY_SIZE]
+        self.position_history[slots, self.position_count[slots] % TRAJECTORY_HISTORY_SIZE] = positions
+        self.position_count[slots] += 1
+
+        delta = positions - previous
+        magnitude = np.hypot(delta[:, 0], delta[:, 1])
+        moving = magnitude > 0
+        if not moving.any():
+            return
+
+        slots = slots[moving]
+        delta = delta[moving]
+        new_direction = delta / magnitude[moving, None]
+        self.direction[slots] = new_direction
+
+        # Atualiza o histórico circular de direções
+        self.direction_history[slots, self.direction_count[slots] % TRAJECTORY_HISTORY_SIZE] = new_direction
+        self.direction_count[slots] += 1
+        samples = np.minimum(self.direction_count[slots], TRAJECTORY_HISTORY_SIZE)
+
+        # Direção suavizada usando média móvel
+        average = self.direction_history[slots].sum(axis=1) / samples[:, None]
+        average_magnitude = np.hypot(average[:, 0], average[:, 1])
+        use_average = (samples > 1) & (average_magnitude > 0)
+        safe_magnitude = np.where(use_average, average_magnitude, 1.0)[:, None]
+        self.smoothed_direction[slots] = np.where(use_average[:, None], average / safe_magnitude, new_direction)
+
+        self.movement_angle[slots] = np.degrees(np.arctan2(delta[:, 1], delta[:, 0]))
+
+    def _entrance_points(self, frame_width, frame_height):
+        """Retorna os pontos da linha de entrada em pixels (calculados uma vez por resolução)"""
+        if self.entrance_size != (frame_width, frame_height):
+            (start_x, start_y), (end_x, end_y) = self.entrance_line
+            self.entrance_points = (
+                start_x * frame_width, start_y * frame_height,
+                end_x * frame_width, end_y * frame_height
+            )
+            self.entrance_size = (frame_width, frame_height)
+        return self.entrance_points
+
+    def _check_look_at(self, slots, frame_width, frame_height):
+        """Verifica quais objetos estão olhando para a casa"""
+        start_x, start_y, end_x, end_y = self._entrance_points(frame_width, frame_height)
+        center = self.last_position[slots]
+
+        # Vetor normalizado de cada objeto até o centro da entrada
+        to_entrance = np.array([(start_x + end_x) / 2, (start_y + end_y) / 2]) - center
+        magnitude = np.hypot(to_entrance[:, 0], to_entrance[:, 1])
+        has_direction = magnitude > 0
+        to_entrance /= np.where(has_direction, magnitude, 1.0)[:, None]
+
+        # Ângulo entre a direção do objeto e a direção da entrada
+        dot_product = np.sum(self.smoothed_direction[slots] * to_entrance, axis=1)
+        angle_diff = np.degrees(np.arccos(np.clip(dot_product, -1.0, 1.0)))
+        is_looking = has_direction & (angle_diff <= LOOK_AT_ANGLE_THRESHOLD)
+
+        # Verifica se está a uma distância razoável
+        is_close = (center[:, 0] / frame_width <= LOOK_AT_DISTANCE_THRESHOLD) & (center[:, 1] / frame_height >= 0.5)
+
+        # Confirma olhar apenas se for consistente por alguns frames
+        self.look_at_history[slots, self.look_at_count[slots] % LOOK_AT_FRAMES] = is_looking & is_close
+        self.look_at_count[slots] += 1
+        self.is_looking_at[slots] = (self.look_at_count[slots] >= LOOK_AT_FRAMES) & self.look_at_history[slots].all(axis=1)
+        return self.is_looking_at[slots]
+
+    def _update_interest_score(self, slots, now, frame_width, frame_height):
+        """
+        Atualiza a pontuação de interesse das pessoas
+        Retorna: (array booleano indicando quem atingiu o interesse e ainda não foi registrado,
+                  duração dos interesses encerrados neste frame, NaN para os demais)
+        """
+        start_x, start_y, end_x, end_y = self._entrance_points(frame_width, frame_height)
+        center = self.last_position[slots]
+
+        # Distância perpendicular à linha da casa, normalizada por 40% da largura da tela
+        line_length = np.hypot(end_x - start_x, end_y - start_y)
+        if line_length > 0:
+            line_dx = (end_x - start_x) / line_length
+            line_dy = (end_y - start_y) / line_length
+            perpendicular = np.abs((center[:, 0] - start_x) * line_dy - (center[:, 1] - start_y) * line_dx)
+            normalized_distance = np.minimum(perpendicular / (frame_width * 0.4), 1.0)
+            # Quanto mais próximo da linha, menor o decaimento
+            decay_factor = INTEREST_SCORE_DECAY + (1 - INTEREST_SCORE_DECAY) * (1 - normalized_distance)
+        else:
+            normalized_distance = np.ones(len(slots))
+            decay_factor = INTEREST_SCORE_DECAY
+
+        self.last_distance[slots] = normalized_distance
+        score = self.interest_score[slots] * decay_factor
+
+        # Pontos por olhar para a casa e por estar parado próximo à linha
+        is_looking = self._check_look_at(slots, frame_width, frame_height)
+        is_standing = self.last_speed[slots] <= INTEREST_SPEED_THRESHOLD
+        score += np.where(is_looking, INTEREST_SCORE_LOOK_AT, 0)
+        score += np.where(is_standing & (normalized_distance < INTEREST_DISTANCE_THRESHOLD), INTEREST_SCORE_STANDING, 0)
+        self.interest_score[slots] = score
+
+        # Atualiza status de interesse
+        above = score >= INTEREST_SCORE_THRESHOLD
+        started = slots[above & ~self.is_interested[slots]]
+        self.is_interested[started] = True
+        self.interest_start_time[started] = now
+        self.has_logged_interest[started] = False
+
+        should_log = above & ~self.has_logged_interest[slots]
+        self.has_logged_interest[slots[should_log]] = True
+
+        lost_mask = ~above & self.is_interested[slots]
+        lost = slots[lost_mask]
+        ended = np.full(len(slots), np.nan)
+        ended[lost_mask] = now - self.interest_start_time[lost]
+        self.is_interested[lost] = False
+        self.interest_start_time[lost] = np.nan
+        self.has_logged_interest[lost] = False
+        return should_log, ended
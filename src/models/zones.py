@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+from src.config.settings import ZONE_MASK_SCALE
+
+# Máximo de zonas por câmera (um bit por zona na máscara de 64 bits)
+MAX_ZONES = 64
+
+
+class ZoneMap:
+    def __init__(self, zones=None, tripwires=None, mask_scale=ZONE_MASK_SCALE):
+        """
+        Zonas poligonais nomeadas e linhas de passagem de uma câmera
+        As zonas são rasterizadas uma única vez por resolução em uma máscara de bits
+        (bit i = zona i), então a zona de todos os pontos do frame sai de uma única indexação
+        zones: lista de {"name": ..., "points": [(x, y), ...]} em percentual
+        tripwires: lista de {"name": ..., "start": (x, y), "end": (x, y)} em percentual
+        mask_scale: resolução da máscara em relação ao frame
+        """
+        zones = zones or []
+        if len(zones) > MAX_ZONES:
+            raise ValueError(f"No máximo {MAX_ZONES} zonas por câmera (configuradas: {len(zones)})")
+        self.zone_names = [zone["name"] for zone in zones]
+        self.zone_points = [np.asarray(zone["points"], dtype=np.float64) for zone in zones]
+        self.tripwire_names = [tripwire["name"] for tripwire in (tripwires or [])]
+        self.tripwire_points = np.array(
+            [[*tripwire["start"], *tripwire["end"]] for tripwire in (tripwires or [])], dtype=np.float64
+        ).reshape(-1, 4)
+        self.mask_scale = mask_scale
+
+        # Cache por resolução
+        self.shape = None
+        self.mask = None
+        self.polygons = None
+        self.tripwires = None
+
+    def __len__(self):
+        return len(self.zone_names)
+
+    def points(self):
+        """Todos os vértices das zonas e pontas das linhas de passagem em percentual (n, 2)"""
+        return np.concatenate([points.reshape(-1, 2) for points in self.zone_points] + [self.tripwire_points.reshape(-1, 2)])
+
+    def _build(self, shape):
+        """Converte as zonas e linhas para pixels e rasteriza a máscara de bits"""
+        h, w = shape[:2]
+        mask_h, mask_w = max(1, round(h * self.mask_scale)), max(1, round(w * self.mask_scale))
+        mask = np.zeros((mask_h, mask_w), dtype=np.uint64)
+        layer = np.zeros((mask_h, mask_w), dtype=np.uint8)
+
+        self.polygons = []
+        for i, points in enumerate(self.zone_points):
+            polygon = np.round(points * (w, h)).astype(np.int32)
+            self.polygons.append(polygon)
+            layer[:] = 0
+            cv2.fillPoly(layer, [np.round(points * (mask_w, mask_h)).astype(np.int32)], 1)
+            mask[layer > 0] |= np.uint64(1 << i)
+
+        self.tripwires = self.tripwire_points * (w, h, w, h)
+        self.mask = mask
+        self.shape = shape[:2]
+
+    def _ensure(self, shape):
+        if self.shape != shape[:2]:
+            self._build(shape)
+
+    def lookup(self, points, shape):
+        """
+        Zonas de cada ponto em uma única indexação da máscara
+        points: array (n, 2) em pixels
+        Retorna: array uint64 (n,) com o bit i ligado quando o ponto está na zona i
+        """
+        self._ensure(shape)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        mask_h, mask_w = self.mask.shape
+        x = np.clip((points[:, 0] * self.mask_scale).astype(np.intp), 0, mask_w - 1)
+        y = np.clip((points[:, 1] * self.mask_scale).astype(np.intp), 0, mask_h - 1)
+        return self.mask[y, x]
+
+    def names(self, bits):
+        """Nomes das zonas ligadas em uma máscara de bits"""
+        bits = int(bits)
+        return [name for i, name in enumerate(self.zone_names) if bits >> i & 1]
+
+    def polygons_for(self, shape):
+        """Polígonos das zonas em pixels para a resolução do frame"""
+        self._ensure(shape)
+        return self.polygons
+
+    def crossings(self, starts, ends, shape):
+        """
+        Testa o último deslocamento de cada objeto contra todas as linhas de passagem de uma vez
+        Um deslocamento cruza a linha quando as pontas ficam em lados opostos dela
+        e o ponto de cruzamento cai dentro do segmento da linha
+        starts/ends: arrays (n, 2) em pixels com a posição anterior e a atual de cada objeto
+        Retorna: (índices dos objetos, índices das linhas, direções) onde a direção é 0 para entrada
+                 (da esquerda para a direita de quem olha do início para o fim da linha) e 1 para saída
+        """
+        lines = self.tripwires_for(shape)
+        starts = np.asarray(starts, dtype=np.float64).reshape(-1, 1, 2)
+        ends = np.asarray(ends, dtype=np.float64).reshape(-1, 1, 2)
+        origin = lines[None, :, :2]
+        line = lines[None, :, 2:] - origin
+        motion = ends - starts
+
+        # Lado de cada ponta em relação a cada linha (produto vetorial), matriz (objetos, linhas)
+        side_start = line[..., 0] * (starts - origin)[..., 1] - line[..., 1] * (starts - origin)[..., 0]
+        side_end = line[..., 0] * (ends - origin)[..., 1] - line[..., 1] * (ends - origin)[..., 0]
+        crossed = (side_start < 0) != (side_end < 0)
+
+        # Posição do cruzamento ao longo da linha (0 = início, 1 = fim)
+        denominator = motion[..., 0] * line[..., 1] - motion[..., 1] * line[..., 0]
+        offset = origin - starts
+        numerator = offset[..., 0] * motion[..., 1] - offset[..., 1] * motion[..., 0]
+        position = np.divide(numerator, denominator, out=np.full(crossed.shape, -1.0), where=crossed)
+        crossed &= (position >= 0) & (position <= 1)
+
+        objects, tripwires = np.nonzero(crossed)
+        directions = (side_end[objects, tripwires] < 0).astype(np.intp)
+        return objects, tripwires, directions
+
+    def tripwires_for(self, shape):
+        """Linhas de passagem em pixels (n, 4): x_inicial, y_inicial, x_final, y_final"""
+        self._ensure(shape)
+        return self.tripwires
@@ -0,0 +1,167 @@
+from functools import lru_cache
+import cv2
+import numpy as np
+from src.config.settings import (
+    ARROW_LENGTH, ARROW_COLOR, ARROW_THICKNESS, ENTRANCE_LINE_COLOR,
+    ENTRANCE_LINE_THICKNESS, LOOK_AT_COLOR, BOX_COLORS, BOX_THICKNESS, ZONE_COLOR, TRIPWIRE_COLOR
+)
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+TEXT_SCALE = 0.6
+TEXT_THICKNESS = 2
+LABEL_SCALE = 0.5
+LABEL_THICKNESS = 1
+TEXT_PADDING = 5
+
+
+@lru_cache(maxsize=2048)
+def text_size(text, font_scale, thickness):
+    """Mede o texto uma única vez e reaproveita a medida nos próximos frames"""
+    (text_width, text_height), _ = cv2.getTextSize(text, FONT, font_scale, thickness)
+    return text_width, text_height
+
+
+class AnnotationRenderer:
+    def __init__(self, area, entrance_line, names, zone_map=None):
+        """
+        Desenha as anotações do frame
+        A área de interesse, a linha de entrada, as zonas e as linhas de passagem são desenhadas
+        uma única vez por resolução em uma camada estática que é apenas copiada sobre cada frame
+        area: área de interesse (x_min, y_min, x_max, y_max) em percentual
+        entrance_line: linha de entrada ((x_inicial, y_inicial), (x_final, y_final)) em percentual
+        names: nomes das classes do detector
+        zone_map: zonas nomeadas e linhas de passagem da câmera (ZoneMap)
+        """
+        self.area = area
+        self.entrance_line = entrance_line
+        self.names = names
+        self.zone_map = zone_map
+        self.static_shape = None
+        self.static_layer = None
+        self.static_pixels = None
+
+    def _build_static_layer(self, shape):
+        """Desenha as sobreposições estáticas para a resolução do frame"""
+        h, w = shape[:2]
+        layer = np.zeros(shape, dtype=np.uint8)
+
+        # Área de interesse
+        x_min, y_min, x_max, y_max = self.area
+        cv2.rectangle(layer, (int(x_min * w), int(y_min * h)), (int(x_max * w), int(y_max * h)), (255, 0, 0), 2)
+
+        # Zonas nomeadas e linhas de passagem
+        if self.zone_map is not None:
+            for name, polygon in zip(self.zone_map.zone_names, self.zone_map.polygons_for(shape)):
+                cv2.polylines(layer, [polygon], True, ZONE_COLOR, 2)
+                x, y = polygon.min(axis=0)
+                cv2.putText(layer, name, (int(x) + TEXT_PADDING, int(y) + 20), FONT, LABEL_SCALE, ZONE_COLOR, LABEL_THICKNESS)
+            for name, (x1, y1, x2, y2) in zip(self.zone_map.tripwire_names, self.zone_map.tripwires_for(shape)):
+                cv2.line(layer, (int(x1), int(y1)), (int(x2), int(y2)), TRIPWIRE_COLOR, 2)
+                cv2.putText(layer, name, (int((x1 + x2) / 2) + TEXT_PADDING, int((y1 + y2) / 2)), FONT, LABEL_SCALE, TRIPWIRE_COLOR, LABEL_THICKNESS)
+
+        # Linha de entrada da casa
+        (start_x, start_y), (end_x, end_y) = self.entrance_line
+        cv2.line(
+            layer,
+            (int(start_x * w), int(start_y * h)),
+            (int(end_x * w), int(end_y * h)),
+            ENTRANCE_LINE_COLOR,
+            ENTRANCE_LINE_THICKNESS
+        )
+
+        self.static_shape = shape
+        self.static_pixels = np.nonzero(layer.any(axis=2))
+        self.static_layer = layer[self.static_pixels]
+
+    def render(self, frame, detections, active_objects, now, person_class=-1):
+        """
+        Desenha boxes, sobreposições estáticas e informações dos objetos rastreados
+        detections: detecções do frame (Detections)
+        active_objects: dicionário id -> TrackedObject
+        """
+        annotated = frame.copy()
+
+        if self.static_shape != frame.shape:
+            self._build_static_layer(frame.shape)
+        annotated[self.static_pixels] = self.static_layer
+
+        positions = detections.reference_points(person_class)
+        boxes = detections.xyxy.astype(int)
+
+        # Uma única passada pelos boxes: o objeto é encontrado pelo ID no dicionário
+        for i, (x1, y1, x2, y2) in enumerate(boxes.tolist()):
+            obj_id = int(detections.ids[i])
+            self.draw_box(annotated, (x1, y1, x2, y2), int(detections.cls[i]), obj_id, float(detections.conf[i]))
+
+            obj = active_objects.get(obj_id) if obj_id >= 0 else None
+            if obj is not None:
+                self.draw_object_info(annotated, obj, (x1, y1), positions[i], now)
+
+        return annotated
+
+    def draw_box(self, frame, box, cls, obj_id, confidence):
+        """Desenha o retângulo e o rótulo da detecção"""
+        x1, y1, x2, y2 = box
+        color = BOX_COLORS[cls % len(BOX_COLORS)]
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, BOX_THICKNESS)
+
+        label = f"{self.names.get(cls, cls)} {confidence:.2f}"
+        if obj_id >= 0:
+            label = f"id:{obj_id} {label}"
+        text_width, text_height = text_size(label, LABEL_SCALE, LABEL_THICKNESS)
+        top = max(y1 - text_height - 2 * TEXT_PADDING, 0)
+        cv2.rectangle(frame, (x1, top), (x1 + text_width + 2 * TEXT_PADDING, top + text_height + 2 * TEXT_PADDING), color, -1)
+        cv2.putText(frame, label, (x1 + TEXT_PADDING, top + text_height + TEXT_PADDING), FONT, LABEL_SCALE, (255, 255, 255), LABEL_THICKNESS)
+
+    def draw_direction_arrow(self, frame, center, direction, length=ARROW_LENGTH, color=ARROW_COLOR):
+        """Desenha uma seta indicando a direção do movimento"""
+        end_x = int(center[0] + direction[0] * length)
+        end_y = int(center[1] + direction[1] * length)
+        cv2.arrowedLine(frame,
+                       (int(center[0]), int(center[1])),
+                       (end_x, end_y),
+                       color,
+                       ARROW_THICKNESS,
+                       tipLength=0.3)
+
+    def draw_object_info(self, frame, obj, top_left, center, now):
+        """Desenha seta de direção, velocidade, distância e interesse do objeto"""
+        x1, y1 = top_left
+
+        # Desenha seta de direção apenas se a velocidade for maior que 1 km/h
+        if obj.position_count >= 2 and obj.last_speed > 1.0:
+            arrow_color = LOOK_AT_COLOR if obj.is_looking_at else ARROW_COLOR
+            self.draw_direction_arrow(frame, center, obj.smoothed_direction, color=arrow_color)
+
+        # Velocidade e distância à linha (sempre mostra)
+        speed_text = f"{obj.last_speed:.1f} km/h [Dist: {obj.last_distance:.2f}]"
+
+        if obj.is_looking_at:
+            speed_text += " (Olhando)"
+        if obj.is_interested:
+            score_text = f" [Score: {obj.interest_score:.1f}]"
+            if obj.interest_start_time:
+                duration = now - obj.interest_start_time
+                score_text += f" ({duration.total_seconds():.1f}s)"
+            speed_text += score_text
+
+        # Desenha o fundo do texto no topo do retângulo
+        text_width, text_height = text_size(speed_text, TEXT_SCALE, TEXT_THICKNESS)
+        cv2.rectangle(
+            frame,
+            (x1, y1 - text_height - TEXT_PADDING * 2 + 30),
+            (x1 + text_width + TEXT_PADDING * 2, y1 + 30),
+            (0, 0, 0),  # Cor preta para o fundo
+            -1  # Preenche o retângulo
+        )
+
+        # Desenha o texto da velocidade no topo
+        cv2.putText(
+            frame,
+            speed_text,
+            (x1 + TEXT_PADDING, y1 - TEXT_PADDING + 30),
+            FONT,
+            TEXT_SCALE,
+            (255, 255, 255),  # Cor branca para o texto
+            TEXT_THICKNESS
+        )
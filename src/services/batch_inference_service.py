@@ -0,0 +1,133 @@
+import threading
+import time
+from src.config.settings import INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT
+
+
+class InferenceRequest:
+    def __init__(self, frame):
+        self.frame = frame
+        self.submitted_at = time.time()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchInferenceService:
+    def __init__(self, detector, max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait=INFERENCE_MAX_WAIT):
+        """
+        Agrupa os frames de várias câmeras em uma única inferência
+        detector: detector compartilhado (precisa implementar detect_batch)
+        max_batch_size: número máximo de frames por inferência
+        max_wait: tempo máximo (segundos) que o primeiro frame espera pelos demais
+        """
+        self.detector = detector
+        self.names = detector.names
+        self.input_size = getattr(detector, "input_size", None)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+
+        self.pending = []
+        self.active_clients = 0
+        self.condition = threading.Condition()
+        self.running = True
+
+        # Estatísticas
+        self.batches_run = 0
+        self.frames_inferred = 0
+
+        self.thread = threading.Thread(target=self._inference_loop, daemon=True)
+        self.thread.start()
+
+    def register_client(self):
+        """Registra uma câmera ativa (usado para não esperar câmeras paradas)"""
+        with self.condition:
+            self.active_clients += 1
+
+    def unregister_client(self):
+        """Remove uma câmera ativa"""
+        with self.condition:
+            self.active_clients = max(0, self.active_clients - 1)
+            self.condition.notify_all()
+
+    def detect(self, frame):
+        """
+        Envia o frame para o próximo lote e aguarda o resultado
+        Retorna: Detections do frame
+        """
+        request = InferenceRequest(frame)
+        with self.condition:
+            if not self.running:
+                raise RuntimeError("Serviço de inferência encerrado")
+            self.pending.append(request)
+            self.condition.notify_all()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _batch_ready(self):
+        """Verifica se o lote pode ser executado sem esperar mais frames"""
+        expected = min(self.max_batch_size, max(1, self.active_clients))
+        return len(self.pending) >= expected
+
+    def _next_batch(self):
+        """Aguarda o próximo lote respeitando o tamanho e o tempo máximo de espera"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.pending or not self.running)
+            if not self.running:
+                return []
+
+            # O primeiro frame da fila define o prazo do lote
+            deadline = self.pending[0].submitted_at + self.max_wait
+            while self.running and not self._batch_ready():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            batch = self.pending[:self.max_batch_size]
+            del self.pending[:self.max_batch_size]
+            return batch
+
+    def _inference_loop(self):
+        """Executa os lotes de inferência e devolve os resultados para cada câmera"""
+        while self.running:
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                results = self.detector.detect_batch([request.frame for request in batch])
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+
+            self.batches_run += 1
+            self.frames_inferred += len(batch)
+            for request in batch:
+                request.done.set()
+
+    def get_stats(self):
+        """Retorna estatísticas dos lotes executados"""
+        average = self.frames_inferred / self.batches_run if self.batches_run else 0.0
+        return {
+            "batches_run": self.batches_run,
+            "frames_inferred": self.frames_inferred,
+            "average_batch_size": average,
+        }
+
+    def stop(self):
+        """Encerra o serviço e libera as câmeras que estavam aguardando"""
+        with self.condition:
+            self.running = False
+            pending = self.pending
+            self.pending = []
+            self.condition.notify_all()
+
+        for request in pending:
+            request.error = RuntimeError("Serviço de inferência encerrado")
+            request.done.set()
+        self.thread.join(timeout=2)
@@ -0,0 +1,156 @@
+import threading
+from src.services.detection_service import DetectionService
+from src.services.detector_service import create_detector
+from src.services.batch_inference_service import BatchInferenceService
+from src.services.stream_broadcaster import FrameBroadcaster
+from src.services.display_stream import DisplayStream
+from src.config.settings import INFERENCE_MAX_BATCH_SIZE, PIPELINE_MODE
+
+
+class CameraPipeline:
+    def __init__(self, config, detector):
+        """
+        Pipeline de uma câmera: captura, detecção, tracking e anotação
+        config: dicionário com id, url e, opcionalmente, area, entrance_line, zones, tripwires, input_size, recalibrate_depth
+                e display_url (stream principal do modo dual-stream; url passa a ser o sub-stream)
+        detector: detector compartilhado entre todas as câmeras
+        """
+        self.camera_id = str(config["id"])
+        self.config = config
+        self.detector = detector
+        self.detection_service = None
+        self.broadcaster = FrameBroadcaster(camera_id=self.camera_id)  # stream MJPEG desta câmera
+        self.display_stream = DisplayStream(config["display_url"], self.camera_id) if config.get("display_url") else None
+        self.status = "stopped"  # stopped, connecting, running ou error
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Inicia o processamento da câmera em uma thread própria"""
+        self.running = True
+        self.thread = threading.Thread(target=self.processing_loop, daemon=True)
+        self.thread.start()
+
+    def processing_loop(self):
+        """Processa continuamente os frames da câmera"""
+        print(f"[{self.camera_id}] Conectando à câmera em: {self.config['url']}")
+
+        self.status = "connecting"
+        self.detector.register_client()
+        capture = None
+        try:
+            if PIPELINE_MODE == "processes":
+                # Captura em processo próprio, frames entregues por memória compartilhada
+                from src.services.process_pipeline import SharedMemoryCapture
+                capture = SharedMemoryCapture(self.config["url"])
+            self.detection_service = DetectionService(
+                camera_ip=self.config["url"],
+                capture=capture,
+                detector=self.detector,
+                camera_id=self.camera_id,
+                area=self.config.get("area"),
+                entrance_line=self.config.get("entrance_line"),
+                zones=self.config.get("zones"),
+                tripwires=self.config.get("tripwires"),
+                recalibrate_depth=self.config.get("recalibrate_depth", False),
+                input_size=self.config.get("input_size")
+            )
+            self.status = "running"
+            while self.running:
+                output = self.detection_service.process_frame()
+                if output is None:
+                    print(f"[{self.camera_id}] Erro ao processar frame. Tentando reconectar...")
+                    break
+                # Sem clientes assistindo não há por que desenhar nem codificar o frame
+                if not self.broadcaster.has_clients():
+                    continue
+                frame, detections, now = output
+                if self.display_stream is not None:
+                    frame, detections = self.align_to_display(frame, detections)
+                annotated = self.detection_service.draw_annotations(frame, detections, now)
+                self.broadcaster.publish(annotated)
+            self.status = "stopped"
+        except Exception as e:
+            self.status = "error"
+            print(f"[{self.camera_id}] Erro ao conectar com a câmera: {str(e)}")
+            print("Verifique se:")
+            print("1. O IP está correto")
+            print("2. A câmera está ligada e conectada à rede")
+            print("3. A porta 554 está aberta")
+            print("4. O usuário e senha da câmera estão corretos (se necessário)")
+        finally:
+            self.detector.unregister_client()
+            if self.display_stream is not None:
+                self.display_stream.stop()
+            if self.detection_service is not None:
+                self.detection_service.cleanup()
+            elif capture is not None:
+                capture.stop()
+
+    def align_to_display(self, frame, detections):
+        """
+        Troca o frame do sub-stream pelo frame do stream principal capturado no mesmo instante
+        e converte os boxes para a resolução principal
+        Enquanto o stream principal conecta, exibe o próprio sub-stream
+        """
+        self.display_stream.ensure_running()
+        display_frame = self.display_stream.frame_at(self.detection_service.last_captured_at)
+        if display_frame is None:
+            return frame, detections
+
+        sx = display_frame.shape[1] / frame.shape[1]
+        sy = display_frame.shape[0] / frame.shape[0]
+        return display_frame, detections.rescale(sx, sy)
+
+    def stop(self):
+        """Interrompe o processamento da câmera"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+
+class CameraManager:
+    def __init__(self, cameras, detector=None):
+        """
+        Gerencia N pipelines de câmera a partir de uma lista de configurações
+        O modelo YOLO é carregado uma única vez e compartilhado por todas as câmeras
+        Com mais de uma câmera, os frames são agrupados em lotes de inferência
+        """
+        if detector is None and PIPELINE_MODE == "processes":
+            from src.services.process_pipeline import ProcessDetector
+            detector = ProcessDetector()
+        self.detector = detector or create_detector()
+        self.inference = self.detector
+        if len(cameras) > 1 and INFERENCE_MAX_BATCH_SIZE > 1:
+            self.inference = BatchInferenceService(self.detector)
+
+        self.pipelines = {}
+        for config in cameras:
+            pipeline = CameraPipeline(config, self.inference)
+            if pipeline.camera_id in self.pipelines:
+                raise ValueError(f"ID de câmera duplicado: {pipeline.camera_id}")
+            self.pipelines[pipeline.camera_id] = pipeline
+
+    def camera_ids(self):
+        """Retorna os IDs das câmeras na ordem de configuração"""
+        return list(self.pipelines.keys())
+
+    def get(self, camera_id):
+        """Retorna o pipeline da câmera ou None se não existir"""
+        return self.pipelines.get(str(camera_id))
+
+    def start(self):
+        """Inicia todas as câmeras"""
+        for pipeline in self.pipelines.values():
+            pipeline.start()
+
+    def stop(self):
+        """Interrompe todas as câmeras"""
+        for pipeline in self.pipelines.values():
+            pipeline.stop()
+        if self.inference is not self.detector:
+            self.inference.stop()
+        # O detector em processo próprio precisa encerrar o processo de inferência
+        if hasattr(self.detector, "stop"):
+            self.detector.stop()
@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from collections import deque
+import cv2
+from src.config.settings import CAPTURE_BUFFER_SIZE, CAPTURE_READ_TIMEOUT, FRAME_CLOCK
+
+
+class CaptureService:
+    def __init__(self, source, buffer_size=CAPTURE_BUFFER_SIZE, clock=FRAME_CLOCK, clock_start=None):
+        """
+        Lê o stream da câmera em uma thread dedicada
+        Mantém apenas os frames mais recentes em um buffer circular limitado,
+        evitando que o stream acumule atraso enquanto a inferência roda
+        Arquivos de vídeo são lidos sem descarte, no ritmo do pipeline (mais rápido que o tempo real)
+        clock: stream (timestamp do vídeo), wall (hora da captura) ou auto
+        clock_start: hora do primeiro frame no relógio stream
+                     (padrão: data de modificação do arquivo ou hora do primeiro frame da câmera)
+        """
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+
+        # Arquivos: todos os frames, em ordem, com o tempo do próprio vídeo (replays geram os mesmos eventos)
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.clock = ("stream" if self.is_file else "wall") if clock == "auto" else clock
+        if clock_start is None and self.is_file:
+            clock_start = os.path.getmtime(source)
+        self.clock_start = clock_start
+        self.last_timestamp = None
+
+        # Buffer circular: frames antigos são descartados automaticamente
+        self.buffer = deque(maxlen=buffer_size)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.failed = False
+
+        # Estatísticas de captura
+        self.frames_captured = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0
+
+    def is_opened(self):
+        """Verifica se a câmera foi aberta com sucesso"""
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        """Lê uma propriedade da câmera (ex: cv2.CAP_PROP_FPS)"""
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        """Altera uma propriedade da câmera"""
+        return self.cap.set(prop, value)
+
+    def read_direct(self):
+        """Lê um frame diretamente da câmera (apenas antes de iniciar a thread)"""
+        return self.cap.read()
+
+    def start(self):
+        """Inicia a thread de captura"""
+        if self.running:
+            return
+        self.running = True
+        self.failed = False
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+
+    def _frame_timestamp(self, captured_at):
+        """
+        Timestamp do frame no relógio do pipeline
+        stream: posição do frame no vídeo (CAP_PROP_POS_MSEC) somada à hora do primeiro frame
+        """
+        if self.clock != "stream":
+            return captured_at
+
+        position = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if self.clock_start is None:
+            self.clock_start = captured_at - position
+        timestamp = self.clock_start + position
+
+        # O stream pode reiniciar a contagem (reconexão): o relógio nunca volta
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            self.clock_start += self.last_timestamp - timestamp
+            timestamp = self.last_timestamp
+        self.last_timestamp = timestamp
+        return timestamp
+
+    def _capture_loop(self):
+        """Drena a câmera continuamente para o buffer"""
+        while self.running:
+            ret, frame = self.cap.read()
+            captured_at = time.time()
+            if not ret:
+                with self.condition:
+                    self.failed = True
+                    self.condition.notify_all()
+                break
+            timestamp = self._frame_timestamp(captured_at)
+
+            with self.condition:
+                if self.is_file:
+                    # Arquivo: espera o pipeline em vez de descartar frames
+                    self.condition.wait_for(lambda: len(self.buffer) < self.buffer.maxlen or not self.running)
+                    if not self.running:
+                        break
+                elif len(self.buffer) == self.buffer.maxlen:
+                    # Se o buffer está cheio o frame mais antigo será sobrescrito sem ser processado
+                    self.frames_dropped += 1
+                self.buffer.append((frame, captured_at, timestamp))
+                self.frames_captured += 1
+                self.condition.notify_all()
+
+    def read(self, timeout=CAPTURE_READ_TIMEOUT):
+        """
+        Retorna o frame mais recente do buffer (arquivos: o próximo frame, sem descarte)
+        Retorna: (ret, frame, captured_at, timestamp) onde captured_at é a hora da captura
+                 e timestamp é o tempo do frame no relógio do pipeline
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.buffer or self.failed or not self.running, timeout)
+            if not self.buffer:
+                return False, None, None, None
+
+            if self.is_file:
+                frame, captured_at, timestamp = self.buffer.popleft()
+            else:
+                frame, captured_at, timestamp = self.buffer.pop()
+                # Frames mais antigos que ficaram no buffer nunca serão processados
+                self.frames_dropped += len(self.buffer)
+                self.buffer.clear()
+            self.frames_consumed += 1
+            self.condition.notify_all()
+
+        return True, frame, captured_at, timestamp
+
+    def get_stats(self):
+        """Retorna as estatísticas de captura"""
+        with self.condition:
+            return {
+                "frames_captured": self.frames_captured,
+                "frames_consumed": self.frames_consumed,
+                "frames_dropped": self.frames_dropped,
+            }
+
+    def stop(self):
+        """Para a thread de captura e libera a câmera"""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        self.cap.release()
@@ -0,0 +1,161 @@
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+import cv2
+from src.utils.helpers import log
+from src.config.settings import (
+    CLIP_DIR, CLIP_PRE_SECONDS, CLIP_POST_SECONDS, CLIP_MAX_SECONDS, CLIP_FPS,
+    CLIP_JPEG_QUALITY, CLIP_MAX_WIDTH, CLIP_BUFFER_MAX_BYTES
+)
+
+
+class Clip:
+    def __init__(self, path, packets, until, max_until):
+        """Clipe em gravação: pacotes JPEG anteriores ao alerta + os que chegarem até until"""
+        self.path = path
+        self.until = until
+        self.max_until = max_until
+        self.packets = queue.Queue()
+        for packet in packets:
+            self.packets.put(packet)
+
+    def extend(self, until):
+        """Novo alerta durante a gravação: estende o clipe (até o limite máximo)"""
+        self.until = min(max(self.until, until), self.max_until)
+
+
+class ClipRecorder:
+    def __init__(self, camera_id=None, clip_dir=CLIP_DIR):
+        """
+        Mantém os últimos CLIP_PRE_SECONDS segundos da câmera como JPEGs já codificados
+        O anel é limitado em bytes (CLIP_BUFFER_MAX_BYTES), qualquer que seja a resolução
+        Em um alerta, o anel e os próximos CLIP_POST_SECONDS segundos são gravados em um arquivo
+        A codificação e a gravação rodam em threads próprias: push() e trigger() nunca bloqueiam
+        """
+        self.camera_id = camera_id
+        self.clip_dir = clip_dir
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), CLIP_JPEG_QUALITY]
+        self.interval = 1.0 / CLIP_FPS
+
+        # Anel de pacotes (timestamp, jpeg) limitado em tempo e em bytes
+        self.ring = deque()
+        self.ring_bytes = 0
+        self.active_clip = None
+        self.writer_thread = None
+
+        self.pending = None
+        self.last_push = 0.0
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._encoder_loop, daemon=True)
+        self.thread.start()
+
+    def push(self, frame, timestamp):
+        """
+        Entrega um frame ao gravador (respeitando CLIP_FPS)
+        Só o frame mais recente fica pendente: se o codificador atrasar, frames são pulados
+        """
+        if timestamp - self.last_push < self.interval:
+            return
+        self.last_push = timestamp
+
+        # Reduz (ou copia) o frame: o original pode ser reaproveitado pela captura
+        h, w = frame.shape[:2]
+        if w > CLIP_MAX_WIDTH:
+            frame = cv2.resize(frame, (CLIP_MAX_WIDTH, round(h * CLIP_MAX_WIDTH / w)), interpolation=cv2.INTER_AREA)
+        else:
+            frame = frame.copy()
+
+        with self.condition:
+            self.pending = (timestamp, frame)
+            self.condition.notify()
+
+    def trigger(self, reason, timestamp, track_id=None):
+        """Inicia (ou estende) a gravação de um clipe por causa de um alerta"""
+        with self.condition:
+            if self.active_clip is not None:
+                self.active_clip.extend(timestamp + CLIP_POST_SECONDS)
+                return
+
+            name = f"{self.camera_id or 'camera'}_{datetime.fromtimestamp(timestamp).strftime('%Y%m%d_%H%M%S')}_{reason}"
+            if track_id is not None:
+                name += f"_{track_id}"
+            clip = Clip(
+                os.path.join(self.clip_dir, f"{name}.mjpg"),
+                list(self.ring),
+                timestamp + CLIP_POST_SECONDS,
+                timestamp + CLIP_MAX_SECONDS
+            )
+            self.active_clip = clip
+
+        self.writer_thread = threading.Thread(target=self._write_clip, args=(clip, reason, track_id), daemon=True)
+        self.writer_thread.start()
+
+    def _append(self, timestamp, jpeg):
+        """Adiciona um pacote ao anel descartando os mais antigos (chamado com o lock)"""
+        self.ring.append((timestamp, jpeg))
+        self.ring_bytes += len(jpeg)
+        while self.ring and (self.ring_bytes > CLIP_BUFFER_MAX_BYTES or timestamp - self.ring[0][0] > CLIP_PRE_SECONDS):
+            self.ring_bytes -= len(self.ring.popleft()[1])
+
+        clip = self.active_clip
+        if clip is not None:
+            if timestamp <= clip.until:
+                clip.packets.put((timestamp, jpeg))
+            else:
+                # Fim do clipe: a thread de gravação fecha o arquivo
+                clip.packets.put(None)
+                self.active_clip = None
+
+    def _encoder_loop(self):
+        """Codifica os frames pendentes em JPEG e alimenta o anel e o clipe em gravação"""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or not self.running)
+                if not self.running:
+                    break
+                timestamp, frame = self.pending
+                self.pending = None
+
+            ret, buffer = cv2.imencode('.jpg', frame, self.encode_params)
+            if not ret:
+                continue
+            with self.condition:
+                self._append(timestamp, buffer.tobytes())
+
+    def _write_clip(self, clip, reason, track_id):
+        """
+        Grava os pacotes do clipe como um stream MJPEG (.mjpg, JPEGs concatenados)
+        Os JPEGs do anel são escritos como estão, sem decodificar e recodificar cada frame
+        """
+        os.makedirs(self.clip_dir, exist_ok=True)
+        frames = 0
+        with open(clip.path, 'wb') as f:
+            while True:
+                packet = clip.packets.get()
+                if packet is None:
+                    break
+                f.write(packet[1])
+                frames += 1
+
+        if not frames:
+            os.remove(clip.path)
+            return
+        log(1, f"Clipe salvo: {clip.path} ({frames / CLIP_FPS:.1f}s)", event="clip_saved",
+                camera_id=self.camera_id, track_id=track_id, reason=reason, path=clip.path,
+                timestamp=datetime.now())
+
+    def stop(self):
+        """Encerra o codificador e fecha o clipe em gravação"""
+        with self.condition:
+            self.running = False
+            if self.active_clip is not None:
+                self.active_clip.packets.put(None)
+                self.active_clip = None
+            self.condition.notify_all()
+        self.thread.join(timeout=2)
+        # Termina de gravar o clipe em andamento
+        if self.writer_thread is not None:
+            self.writer_thread.join(timeout=5)
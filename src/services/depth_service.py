@@ -1,68 +1,154 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
 import cv2
 import numpy as np
-import torch
-import torchvision.transforms as transforms
-from PIL import Image
+from src.config.settings import DEPTH_CALIBRATION_FILE
+
+# Evita que duas câmeras gravem o arquivo de calibração ao mesmo tempo
+_calibration_lock = threading.Lock()
+
+
+def camera_key(source):
+    """Remove usuário e senha da URL para usar como chave da calibração"""
+    return re.sub(r"//[^/@]*@", "//", str(source))
+
 
 class DepthService:
-    def __init__(self):
-        # Carrega o modelo MiDaS
+    def __init__(self, camera=None, calibration_file=DEPTH_CALIBRATION_FILE):
+        """
+        camera: identificador da câmera (ID ou URL) usado como chave da calibração
+        calibration_file: arquivo onde as calibrações são salvas
+        O MiDaS só é carregado quando não existe calibração salva para a câmera
+        """
         self.model_type = "DPT_Large"     # MiDaS v3 - Large (mais preciso)
-        self.midas = torch.hub.load("intel-isl/MiDaS", self.model_type)
-        
-        # Move o modelo para GPU se disponível
-        self.device = torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
-        self.midas.to(self.device)
-        self.midas.eval()
-        
-        # Configuração das transformações
-        self.midas_transforms = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Resize((384, 384)),
-            transforms.Normalize(mean=[0.5, 0.5, 0.5], std=[0.5, 0.5, 0.5])
-        ])
-        
+        self.camera = camera_key(camera)
+        self.calibration_file = calibration_file
+
         # Referência de profundidade
         self.reference_depth = None
-        self.reference_frame = None
+        self.reference_height = None
         self.depth_scale = None
+        self.calibration = None
 
-    def calibrate_depth(self, frame):
+    def _calibration_key(self, frame):
+        h, w = frame.shape[:2]
+        return f"{self.camera}@{w}x{h}"
+
+    def _read_calibrations(self):
+        """Lê todas as calibrações salvas"""
+        if not os.path.exists(self.calibration_file):
+            return {}
+        try:
+            with open(self.calibration_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_calibration(self, key, calibration):
+        """Salva a calibração da câmera sem apagar as das outras câmeras"""
+        with _calibration_lock:
+            calibrations = self._read_calibrations()
+            calibrations[key] = calibration
+            tmp_path = f"{self.calibration_file}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(calibrations, f, indent=2)
+            os.replace(tmp_path, self.calibration_file)
+
+    def _apply_calibration(self, calibration):
+        self.calibration = calibration
+        self.depth_scale = calibration["depth_scale"]
+        self.reference_height = calibration["frame_height"]
+
+    def load_calibration(self, frame):
+        """
+        Carrega a calibração salva para esta câmera e resolução
+        Retorna True se encontrou uma calibração
+        """
+        calibration = self._read_calibrations().get(self._calibration_key(frame))
+        if calibration is None:
+            return False
+        self._apply_calibration(calibration)
+        return True
+
+    def calibrate_depth(self, frame, recalibrate=False):
         """
         Calibra a profundidade usando um frame de referência
-        Deve ser chamado apenas uma vez no início
+        Usa a calibração salva quando existir; recalibrate=True força rodar o MiDaS novamente
+        (necessário quando a câmera muda de posição)
         """
+        if not recalibrate and self.load_calibration(frame):
+            return
+
+        self.reference_depth = self._estimate_depth_map(frame)
+
+        # Calcula a escala de profundidade baseada na altura do frame
+        # Assumindo que objetos na parte inferior estão mais próximos
+        h, w = frame.shape[:2]
+        bottom_depth = float(np.mean(self.reference_depth[h-100:h, :]))
+        top_depth = float(np.mean(self.reference_depth[:100, :]))
+
+        calibration = {
+            "model_type": self.model_type,
+            "frame_width": w,
+            "frame_height": h,
+            "depth_scale": (bottom_depth - top_depth) / h,
+            "bottom_depth": bottom_depth,
+            "top_depth": top_depth,
+            "mean_depth": float(np.mean(self.reference_depth)),
+            "std_depth": float(np.std(self.reference_depth)),
+            "min_depth": float(np.min(self.reference_depth)),
+            "max_depth": float(np.max(self.reference_depth)),
+            "calibrated_at": datetime.now().isoformat(),
+        }
+        self._apply_calibration(calibration)
+        self._save_calibration(self._calibration_key(frame), calibration)
+
+    def _estimate_depth_map(self, frame):
+        """Roda o MiDaS uma única vez e libera o modelo em seguida"""
+        # Importado apenas aqui: sem calibração pendente o torch nunca é carregado
+        import torch
+        import torchvision.transforms as transforms
+        from PIL import Image
+
+        # Carrega o modelo MiDaS e move para GPU se disponível
+        midas = torch.hub.load("intel-isl/MiDaS", self.model_type)
+        device = torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
+        midas.to(device)
+        midas.eval()
+
+        # Configuração das transformações
+        midas_transforms = transforms.Compose([
+            transforms.ToTensor(),
+            transforms.Resize((384, 384)),
+            transforms.Normalize(mean=[0.5, 0.5, 0.5], std=[0.5, 0.5, 0.5])
+        ])
+
         # Converte o frame para RGB (MiDaS espera RGB)
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
+
         # Prepara a imagem para o modelo
-        input_batch = self.midas_transforms(Image.fromarray(frame_rgb)).unsqueeze(0)
-        input_batch = input_batch.to(self.device)
-        
+        input_batch = midas_transforms(Image.fromarray(frame_rgb)).unsqueeze(0)
+        input_batch = input_batch.to(device)
+
         # Faz a predição
         with torch.no_grad():
-            prediction = self.midas(input_batch)
+            prediction = midas(input_batch)
             prediction = torch.nn.functional.interpolate(
                 prediction.unsqueeze(1),
                 size=frame.shape[:2],
                 mode='bicubic',
                 align_corners=False
             ).squeeze()
-        
-        # Salva o mapa de profundidade de referência
-        self.reference_depth = prediction.cpu().numpy()
-        self.reference_frame = frame
-        
-        # Calcula a escala de profundidade baseada na altura do frame
-        # Assumindo que objetos na parte inferior estão mais próximos
-        h, w = frame.shape[:2]
-        bottom_depth = np.mean(self.reference_depth[h-100:h, :])
-        top_depth = np.mean(self.reference_depth[:100, :])
-        self.depth_scale = (bottom_depth - top_depth) / h
-        
+        depth_map = prediction.cpu().numpy()
+
         # Limpa recursos do modelo após calibração
-        del self.midas
-        torch.cuda.empty_cache()
+        del midas
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        return depth_map
 
     def estimate_depth_from_position(self, y_position):
         """
@@ -72,13 +158,12 @@ class DepthService:
         """
         if self.depth_scale is None:
             return 0.5  # valor padrão se não houver calibração
-        
+
         # Calcula a profundidade baseada na posição Y
         # Quanto maior o Y, mais próximo o objeto está
-        h = self.reference_frame.shape[0]
-        normalized_y = y_position / h
+        normalized_y = y_position / self.reference_height
         depth = 1.0 - normalized_y  # inverte para que 0 seja mais próximo
-        
+
         return depth
 
     def get_depth_for_box(self, box):
@@ -89,15 +174,28 @@ class DepthService:
         """
         if self.depth_scale is None:
             return 0.5  # valor padrão se não houver calibração
-            
+
         x1, y1, x2, y2 = map(int, box)
         # Usa a posição Y do centro do objeto para estimar a profundidade
         center_y = (y1 + y2) / 2
         return self.estimate_depth_from_position(center_y)
 
+    def get_depth_for_boxes(self, boxes):
+        """
+        Versão vetorizada de get_depth_for_box
+        boxes: array (n, 4) com (x1, y1, x2, y2)
+        Retorna: array (n,) com a profundidade estimada (0-1)
+        """
+        boxes = np.asarray(boxes).reshape(-1, 4)
+        if self.depth_scale is None:
+            return np.full(len(boxes), 0.5)
+
+        y = boxes[:, [1, 3]].astype(int)
+        center_y = (y[:, 0] + y[:, 1]) / 2
+        return 1.0 - center_y / self.reference_height
+
     def cleanup(self):
         """Limpa recursos"""
         self.reference_depth = None
-        self.reference_frame = None
+        self.reference_height = None
         self.depth_scale = None
-        torch.cuda.empty_cache() 
\ No newline at end of file
@@ -1,285 +1,485 @@
 import cv2
+import time
 import numpy as np
 from datetime import datetime, timedelta
-from ultralytics import YOLO
-from src.models.tracked_object import TrackedObject
+from src.models.track_store import TrackStore
+from src.models.detections import Detections
+from src.models.zones import ZoneMap
 from src.utils.helpers import log
+from src.utils.metrics import metrics
+from src.utils.scheduler import DeadlineScheduler
 from src.services.depth_service import DepthService
+from src.services.capture_service import CaptureService
+from src.services.detector_service import create_detector, ObjectTracker
+from src.services.motion_service import MotionGate
+from src.services.annotation_renderer import AnnotationRenderer
+from src.services.clip_recorder import ClipRecorder
 from src.config.settings import (
-    RTSP_URL, TIMEOUT_SECONDS, AREA_TIMEOUT_SECONDS,
+    TIMEOUT_SECONDS, AREA_TIMEOUT_SECONDS,
     AREA_PRESENCE_THRESHOLD, AREA_X_MIN, AREA_X_MAX,
-    AREA_Y_MIN, AREA_Y_MAX, ARROW_LENGTH, ARROW_COLOR,
-    ARROW_THICKNESS, ENTRANCE_LINE_START_X, ENTRANCE_LINE_START_Y,
-    ENTRANCE_LINE_END_X, ENTRANCE_LINE_END_Y, ENTRANCE_LINE_COLOR,
-    ENTRANCE_LINE_THICKNESS, MIN_CONFIDENCE, 
-    MIN_SPEED_THRESHOLD, MAX_SPEED_THRESHOLD,
-    ARROW_TIP_LENGTH, ARROW_TIP_ANGLE, LOOK_AT_COLOR
+    AREA_Y_MIN, AREA_Y_MAX, ENTRANCE_LINE_START_X, ENTRANCE_LINE_START_Y,
+    ENTRANCE_LINE_END_X, ENTRANCE_LINE_END_Y, MIN_CONFIDENCE,
+    MOTION_GATE_ENABLED, MOTION_REPORT_INTERVAL, ROI_INFERENCE_ENABLED, ROI_MARGIN,
+    DETECTOR_INPUT_SIZE, CLIP_RECORDER_ENABLED, ZONES, TRIPWIRES, ENTRANCE_LINE_COUNTING
 )
 
 class DetectionService:
-    def __init__(self, camera_ip=None):
-        # Carrega o modelo YOLO
-        self.model = YOLO("yolov8n.pt")
+    def __init__(self, camera_ip=None, detector=None, camera_id=None, area=None, entrance_line=None,
+                 recalibrate_depth=False, capture=None, tracker=None, calibrate_depth=True, input_size=None,
+                 zones=None, tripwires=None):
+        """
+        camera_ip: URL RTSP da câmera
+        detector: detector compartilhado; se omitido, cria um do backend configurado
+        camera_id: identificador da câmera (usado nos logs e nas rotas)
+        area: área de interesse (x_min, y_min, x_max, y_max) em percentual
+        entrance_line: linha de entrada ((x_inicial, y_inicial), (x_final, y_final)) em percentual
+        recalibrate_depth: ignora a calibração de profundidade salva e roda o MiDaS novamente
+        capture: fonte de frames (padrão: CaptureService lendo camera_ip)
+        tracker: tracker da câmera (padrão: ObjectTracker)
+        calibrate_depth: se False, não calibra a profundidade (usa o valor padrão)
+        input_size: lado maior da imagem enviada ao detector (padrão: DETECTOR_INPUT_SIZE;
+                    modelos exportados usam sempre a própria entrada fixa)
+        zones: zonas poligonais nomeadas (padrão: ZONES)
+        tripwires: linhas de passagem nomeadas (padrão: TRIPWIRES)
+        """
+        # Usa o detector compartilhado ou carrega o modelo YOLO no backend configurado
+        self.detector = detector or create_detector()
+        self.camera_id = camera_id
+
+        # Zonas desta câmera
+        self.area = area or (AREA_X_MIN, AREA_Y_MIN, AREA_X_MAX, AREA_Y_MAX)
+        self.entrance_line = entrance_line or (
+            (ENTRANCE_LINE_START_X, ENTRANCE_LINE_START_Y),
+            (ENTRANCE_LINE_END_X, ENTRANCE_LINE_END_Y)
+        )
+        self.area_box = None
+        self.area_shape = None
+        tripwires = list(TRIPWIRES if tripwires is None else tripwires)
+        if ENTRANCE_LINE_COUNTING:
+            tripwires.append({"name": "entrada", "start": self.entrance_line[0], "end": self.entrance_line[1]})
+        self.zone_map = ZoneMap(ZONES if zones is None else zones, tripwires)
+
+        # Contadores de passagem por linha: colunas in e out
+        self.tripwire_counts = np.zeros((len(tripwires), 2), dtype=np.int64)
         
         # Inicializa a câmera
         self.camera_ip = camera_ip or "rtsp://192.168.0.100:554/stream"
-        self.cap = cv2.VideoCapture(self.camera_ip)
+        self.capture = capture or CaptureService(self.camera_ip)
         
-        if not self.cap.isOpened():
+        if not self.capture.is_opened():
             raise Exception(f"Não foi possível conectar à câmera em {self.camera_ip}")
             
-        # Inicializa o serviço de profundidade
-        self.depth_service = DepthService()
+        # Inicializa o serviço de profundidade (usa a calibração salva da câmera, se houver)
+        self.depth_service = DepthService(camera_id or self.camera_ip)
         
-        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
         self.frame_time = 1/self.fps
         self.active_objects = {}
+
+        # Estado vetorizado de todos os objetos rastreados desta câmera
+        self.track_store = TrackStore(self.entrance_line)
+
+        # Prazos de saída da cena, saída da área e alerta de presença (só os vencidos são tratados a cada frame)
+        self.deadlines = DeadlineScheduler()
+        self.last_detections = Detections()
+        self.frame_detections = Detections()
+
+        # Classe usada para calcular o ponto de referência pelos pés
+        self.person_class = next((cls for cls, name in self.detector.names.items() if name == "person"), -1)
+
+        # Renderizador das anotações (camada estática cacheada por resolução)
+        self.renderer = AnnotationRenderer(self.area, self.entrance_line, self.detector.names, self.zone_map)
+
+        # Tracker próprio da câmera (IDs independentes entre câmeras)
+        self.tracker = tracker or ObjectTracker(frame_rate=self.fps)
+
+        # Região monitorada: área, linha de entrada, zonas e linhas de passagem (em percentual)
+        self.monitored_region = self.calculate_monitored_region()
+
+        # Filtro de movimento: evita rodar a detecção com a região monitorada parada
+        self.motion_gate = MotionGate(self.monitored_region) if MOTION_GATE_ENABLED else None
+        self.last_motion_report = time.time()
+
+        # Tamanho da imagem enviada ao detector (os boxes voltam para a resolução original)
+        self.input_size = input_size or DETECTOR_INPUT_SIZE
+        # Modelo exportado tem entrada fixa: reduzir abaixo dela só perde precisão
+        # (o letterbox volta ao tamanho do modelo), então vale o tamanho do modelo
+        model_size = getattr(self.detector, "input_size", None)
+        if model_size and self.input_size != model_size:
+            log(1, f"[{self.camera_id or self.camera_ip}] input_size {self.input_size} diferente da entrada do modelo exportado ({model_size}); "
+                   f"usando {model_size}. Exporte um modelo com --imgsz {self.input_size} para este tamanho")
+            self.input_size = model_size
+
+        # Região recortada para a inferência (calculada por resolução)
+        self.roi_enabled = ROI_INFERENCE_ENABLED
+        self.roi_box = None
+        self.roi_shape = None
+
+        # Buffer de vídeo pré-alerta (clipes gravados nos alertas de interesse e de presença)
+        self.clip_recorder = ClipRecorder(camera_id) if CLIP_RECORDER_ENABLED else None
+
+        # Timestamp de captura do último frame lido (usado no alinhamento do modo dual-stream)
+        self.last_captured_at = None
+
+        # Latência entre a captura do frame e o início da inferência (segundos)
+        self.capture_latency = 0.0
         
         # Calibra a profundidade com o primeiro frame
-        ret, frame = self.cap.read()
-        if ret:
-            self.depth_service.calibrate_depth(frame)
-            # Volta o vídeo para o início
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        if calibrate_depth:
+            ret, frame = self.capture.read_direct()
+            if ret:
+                self.depth_service.calibrate_depth(frame, recalibrate=recalibrate_depth)
+                # Volta o vídeo para o início
+                self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+        # Inicia a thread de captura
+        self.capture.start()
 
     def calculate_area_box(self, frame_shape):
-        """Calcula as coordenadas da área de interesse"""
-        return (
-            AREA_X_MIN * frame_shape[1],
-            AREA_Y_MIN * frame_shape[0],
-            AREA_X_MAX * frame_shape[1],
-            AREA_Y_MAX * frame_shape[0]
-        )
+        """Calcula as coordenadas da área de interesse (uma vez por resolução)"""
+        if self.area_shape != frame_shape[:2]:
+            x_min, y_min, x_max, y_max = self.area
+            self.area_box = (
+                x_min * frame_shape[1],
+                y_min * frame_shape[0],
+                x_max * frame_shape[1],
+                y_max * frame_shape[0]
+            )
+            self.area_shape = frame_shape[:2]
+        return self.area_box
+
+    def calculate_monitored_region(self):
+        """
+        Retângulo que envolve a área de interesse, a linha de entrada, as zonas e as linhas de passagem
+        Retorna: (x_min, y_min, x_max, y_max) em percentual, limitado ao frame
+        """
+        (line_x1, line_y1), (line_x2, line_y2) = self.entrance_line
+        points = np.concatenate([
+            [self.area[:2], self.area[2:], (line_x1, line_y1), (line_x2, line_y2)],
+            self.zone_map.points()
+        ])
+        x_min, y_min = np.clip(points.min(axis=0), 0.0, 1.0)
+        x_max, y_max = np.clip(points.max(axis=0), 0.0, 1.0)
+        return float(x_min), float(y_min), float(x_max), float(y_max)
+
+    def calculate_roi_box(self, frame_shape):
+        """
+        Calcula a região usada na inferência: região monitorada + margem
+        Retorna: (x1, y1, x2, y2) em pixels inteiros, limitado ao frame
+        """
+        if self.roi_shape != frame_shape[:2]:
+            x_min, y_min, x_max, y_max = self.monitored_region
+            x_min, y_min = x_min - ROI_MARGIN, y_min - ROI_MARGIN
+            x_max, y_max = x_max + ROI_MARGIN, y_max + ROI_MARGIN
+
+            h, w = frame_shape[:2]
+            self.roi_box = (
+                int(max(0.0, x_min) * w),
+                int(max(0.0, y_min) * h),
+                int(np.ceil(min(1.0, x_max) * w)),
+                int(np.ceil(min(1.0, y_max) * h))
+            )
+            self.roi_shape = frame_shape[:2]
+            x1, y1, x2, y2 = self.roi_box
+            metrics.set_gauge("inference_pixel_ratio", (x2 - x1) * (y2 - y1) / (w * h), self.camera_id)
+        return self.roi_box
+
+    def detect(self, frame):
+        """Roda o detector no frame inteiro ou só no recorte da região de interesse"""
+        x1, y1 = 0, 0
+        if self.roi_enabled:
+            x1, y1, x2, y2 = self.calculate_roi_box(frame.shape)
+            frame = frame[y1:y2, x1:x2]
 
-    def is_inside_area(self, box, area_box):
-        """Verifica se o objeto está dentro da área de interesse"""
-        x1, y1, x2, y2 = box
-        xA = max(x1, area_box[0])
-        yA = max(y1, area_box[1])
-        xB = min(x2, area_box[2])
-        yB = min(y2, area_box[3])
-        inter_area = max(0, xB - xA) * max(0, yB - yA)
-        box_area = (x2 - x1) * (y2 - y1)
-        return inter_area > 0.1 * box_area
-
-    def draw_direction_arrow(self, frame, center, direction, length=ARROW_LENGTH, color=ARROW_COLOR):
-        """Desenha uma seta indicando a direção do movimento"""
-        end_x = int(center[0] + direction[0] * length)
-        end_y = int(center[1] + direction[1] * length)
-        cv2.arrowedLine(frame, 
-                       (int(center[0]), int(center[1])),
-                       (end_x, end_y),
-                       color,
-                       ARROW_THICKNESS,
-                       tipLength=0.3)
+        # Reduz uma única vez para o tamanho de entrada do detector (None: frame inteiro, sem redução)
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.input_size / max(h, w)) if self.input_size else 1.0
+        if scale < 1.0:
+            frame = cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_LINEAR)
+
+        # Os boxes voltam para as coordenadas do frame inteiro antes do tracking
+        return self.detector.detect(frame).offset(x1, y1, 1 / scale)
 
     def process_frame(self):
-        """Processa um frame da câmera"""
-        ret, frame = self.cap.read()
+        """
+        Processa um frame da câmera
+        Todo o processamento usa o timestamp do frame (e não a hora atual): velocidades e tempos
+        na área não dependem do atraso do pipeline e um vídeo gravado gera sempre os mesmos eventos
+        """
+        with metrics.timer("capture", self.camera_id):
+            ret, frame, captured_at, timestamp = self.capture.read()
+        self.last_captured_at = captured_at
         if not ret:
-            log(1, "Erro ao acessar o stream")
+            log(1, "Erro ao acessar o stream", event="stream_error", camera_id=self.camera_id, timestamp=datetime.now())
             return None
+        now = datetime.fromtimestamp(timestamp)
+
+        if self.clip_recorder is not None:
+            self.clip_recorder.push(frame, timestamp)
+
+        # Sem movimento e sem objetos rastreados: pula a detecção
+        if self.motion_gate is not None:
+            with metrics.timer("motion_gate", self.camera_id):
+                should_detect = self.motion_gate.should_detect(frame, timestamp, bool(self.active_objects))
+            self.report_motion_stats()
+            if not should_detect:
+                self.last_detections = Detections()
+                self.frame_detections = Detections()
+                self.cleanup_objects(now)
+                metrics.inc("frames_skipped_total", self.camera_id)
+                self.update_metrics()
+                return frame, self.frame_detections, now
 
-        results = self.model.track(source=frame, persist=True, conf=0.5, verbose=False)
-        now = datetime.now()
+        self.capture_latency = time.time() - captured_at
+        with metrics.timer("inference", self.camera_id):
+            detections = self.detect(frame)
+        with metrics.timer("tracker", self.camera_id):
+            detections = self.tracker.update(detections, frame)
+        track_update_started = time.perf_counter()
         current_ids = set()
         area_box = self.calculate_area_box(frame.shape)
 
-        for r in results:
-            for box in r.boxes:
-                # Verifica se o box tem ID e se é válido
-                if box.id is None or len(box.id) == 0:
-                    continue
-                    
-                try:
-                    obj_id = int(box.id[0])
-                    confidence = float(box.conf[0])  # Obtém a confiança da detecção
-                    
-                    # Ignora detecções com baixa confiança
-                    if confidence < 0.65:  # 65% de confiança
-                        continue
-                        
-                except (ValueError, IndexError):
-                    continue
-
-                current_ids.add(obj_id)
-                x1, y1, x2, y2 = box.xyxy[0]
-                
-                # Calcula a posição do objeto
-                # Para pessoas, usa um ponto 10% acima dos pés
-                # Para outros objetos, usa o centro do retângulo
-                if self.model.names[int(box.cls[0])] == "person":
-                    center_x = (x1 + x2) / 2
-                    height = y2 - y1
-                    center_y = y2 - (height * 0.1)  # 10% acima dos pés
-                else:
-                    center_x = (x1 + x2) / 2
-                    center_y = (y1 + y2) / 2
-                    
-                current_position = (center_x, center_y)
-
-                # Obtém a profundidade do objeto
-                depth = self.depth_service.get_depth_for_box((x1, y1, x2, y2))
-
-                if obj_id not in self.active_objects:
-                    self.active_objects[obj_id] = TrackedObject(
-                        obj_id,
-                        self.model.names[int(box.cls[0])],
-                        current_position
-                    )
-                    log(1, f"ID: {obj_id} - {self.active_objects[obj_id].label} ENTROU às {now.strftime('%H:%M:%S')}")
-                else:
-                    obj = self.active_objects[obj_id]
-                    time_diff = (now - obj.last_speed_update).total_seconds()
-                    if time_diff >= self.frame_time:
-                        obj.update_speed(current_position, time_diff, frame.shape[1], depth)
-                    obj.update_trajectory(current_position)
-                    is_interested, should_log = obj.update_interest_score(frame.shape[1], frame.shape[0])
-                    if is_interested and should_log:
-                        log(2, f"ID {obj_id} - {obj.label} mostrando interesse! Score: {obj.interest_score:.1f} | Distância: {obj.last_distance:.2f}")
-                    obj.last_seen = now
-                    obj.logged_exit = False
-
-                inside_area = self.is_inside_area((x1, y1, x2, y2), area_box)
-                self.active_objects[obj_id].update_area_status(inside_area, now)
+        # Filtra de forma vetorizada: apenas boxes com ID e com confiança mínima
+        self.frame_detections = detections
+        detections = detections[(detections.ids >= 0) & (detections.conf >= MIN_CONFIDENCE)]
+        positions = detections.reference_points(self.person_class)
+        depths = self.depth_service.get_depth_for_boxes(detections.xyxy)
+        inside_area = detections.area_overlap(area_box)
+        self.last_detections = detections
+
+        # Objetos já existentes vistos neste frame (atualizados de uma vez no final)
+        seen_objects = []
+        seen_indices = []
+
+        for i, obj_id in enumerate(detections.ids.tolist()):
+            current_ids.add(obj_id)
+
+            if obj_id not in self.active_objects:
+                self.active_objects[obj_id] = self.track_store.create_track(
+                    obj_id,
+                    self.detector.names[int(detections.cls[i])],
+                    positions[i],
+                    now.timestamp()
+                )
+                obj = self.active_objects[obj_id]
+                log(1, f"ID: {obj_id} - {obj.label} ENTROU às {now.strftime('%H:%M:%S')}",
+                    event="entry", **self.event_fields(obj, now))
+                self.deadlines.schedule(("exit", obj_id), now.timestamp() + TIMEOUT_SECONDS)
+            else:
+                obj = self.active_objects[obj_id]
+                seen_objects.append(obj)
+                seen_indices.append(i)
+                obj.last_seen = now
+                obj.logged_exit = False
+
+            was_in_area = obj.is_in_area
+            obj.update_area_status(bool(inside_area[i]), now)
+            if obj.is_in_area != was_in_area:
+                self.schedule_area_deadline(obj)
+
+        # Passagens pelas linhas: o deslocamento de todos os objetos contra todas as linhas de uma vez
+        if len(self.tripwire_counts) and seen_objects:
+            current_positions = positions[seen_indices]
+            previous_positions = self.track_store.update_crossing_positions(
+                [obj.slot for obj in seen_objects], current_positions
+            )
+            objects, tripwires, directions = self.zone_map.crossings(previous_positions, current_positions, frame.shape)
+            if len(objects):
+                np.add.at(self.tripwire_counts, (tripwires, directions), 1)
+                for i, tripwire, direction in zip(objects.tolist(), tripwires.tolist(), directions.tolist()):
+                    self.log_crossing(seen_objects[i], tripwire, direction, now)
+
+        # Zonas nomeadas de todos os objetos em uma única consulta à máscara
+        if len(self.zone_map) and len(detections):
+            slots = [self.active_objects[obj_id].slot for obj_id in detections.ids.tolist()]
+            zone_bits = self.zone_map.lookup(positions, frame.shape)
+            previous = self.track_store.update_zones(slots, zone_bits)
+            for i in np.flatnonzero(zone_bits != previous):
+                obj = self.active_objects[int(detections.ids[i])]
+                self.log_zone_changes(obj, previous[i], zone_bits[i], now)
+
+        # Atualiza velocidade, trajetória e interesse de todos os objetos de uma vez
+        should_log, interest_ended = self.track_store.update(
+            [obj.slot for obj in seen_objects],
+            positions[seen_indices],
+            depths[seen_indices],
+            now.timestamp(),
+            frame.shape[1],
+            frame.shape[0],
+            self.frame_time
+        )
+        for obj, log_interest, interest_duration in zip(seen_objects, should_log, interest_ended.tolist()):
+            if log_interest:
+                log(2, f"ID {obj.id} - {obj.label} mostrando interesse! Score: {obj.interest_score:.1f} | Distância: {obj.last_distance:.2f}",
+                    event="interest", score=obj.interest_score, distance=obj.last_distance, **self.event_fields(obj, now))
+                self.record_clip("interest", obj, now)
+            elif not np.isnan(interest_duration):
+                self.log_interest_end(obj, interest_duration, now)
+        metrics.observe("track_update", time.perf_counter() - track_update_started, self.camera_id)
 
         self.cleanup_objects(now)
-        return frame, results, now
+        metrics.inc("frames_processed_total", self.camera_id)
+        self.update_metrics()
+        return frame, self.frame_detections, now
+
+    def update_metrics(self):
+        """Atualiza os contadores e medidores da câmera exportados em /metrics"""
+        stats = self.capture.get_stats()
+        if "frames_dropped" in stats:
+            metrics.set_counter("frames_dropped_total", stats["frames_dropped"], self.camera_id)
+        metrics.set_gauge("active_tracks", len(self.active_objects), self.camera_id)
+        metrics.set_gauge("capture_latency_seconds", self.capture_latency, self.camera_id)
+
+    def event_fields(self, obj, now):
+        """Campos comuns dos eventos estruturados de um objeto"""
+        return {"camera_id": self.camera_id, "track_id": obj.id, "label": obj.label, "timestamp": now}
 
     def cleanup_objects(self, now):
         """Limpa objetos que saíram da câmera ou da área"""
-        for oid, obj in list(self.active_objects.items()):
-            if now - obj.last_seen > timedelta(seconds=TIMEOUT_SECONDS):
-                if not obj.logged_exit:
-                    log(1, f"ID: {oid} - {obj.label} SAIU às {now.strftime('%H:%M:%S')}")
-                    if obj.total_area_time.total_seconds() > 0:
-                        log(1, f"ID: {oid} - {obj.label} permaneceu {obj.total_area_time.total_seconds():.1f}s na área")
-                    if obj.last_speed > 0:
-                        log(1, f"ID: {oid} - {obj.label} velocidade média: {obj.last_speed:.1f} km/h")
-                    obj.logged_exit = True
-                del self.active_objects[oid]
+        with metrics.timer("cleanup", self.camera_id):
+            self._cleanup_objects(now)
+
+    def log_interest_end(self, obj, duration, now):
+        """Fecha o episódio de interesse do objeto (registra a duração)"""
+        log(1, f"ID {obj.id} - {obj.label} deixou de mostrar interesse após {duration:.1f}s",
+            event="interest_end", duration=duration, score=obj.interest_score, **self.event_fields(obj, now))
+
+    def log_crossing(self, obj, tripwire, direction, now):
+        """Registra a passagem de um objeto por uma linha"""
+        name = self.zone_map.tripwire_names[tripwire]
+        direction = ("in", "out")[direction]
+        log(1, f"ID: {obj.id} - {obj.label} cruzou a linha {name} ({direction})",
+            event="tripwire_crossing", tripwire=name, direction=direction, **self.event_fields(obj, now))
+
+    def get_tripwire_counts(self):
+        """Retorna as passagens de entrada e saída de cada linha"""
+        return [
+            {"name": name, "in": int(counts[0]), "out": int(counts[1])}
+            for name, counts in zip(self.zone_map.tripwire_names, self.tripwire_counts)
+        ]
+
+    def log_zone_changes(self, obj, previous, current, now):
+        """Registra as entradas e saídas do objeto nas zonas nomeadas"""
+        for zone in self.zone_map.names(previous & ~current):
+            log(1, f"ID: {obj.id} - {obj.label} saiu da zona {zone}", event="zone_exit", zone=zone, **self.event_fields(obj, now))
+        for zone in self.zone_map.names(current & ~previous):
+            log(1, f"ID: {obj.id} - {obj.label} entrou na zona {zone}", event="zone_enter", zone=zone, **self.event_fields(obj, now))
+
+    def schedule_area_deadline(self, obj):
+        """Agenda o próximo prazo de área do objeto: alerta de presença (dentro) ou saída da área (fora)"""
+        if obj.is_in_area:
+            if obj.alerted_level < 2:
+                remaining = AREA_PRESENCE_THRESHOLD - obj.total_area_time.total_seconds()
+                self.deadlines.schedule(("presence", obj.id), obj.area_entry_time.timestamp() + remaining)
+        elif obj.last_area_exit:
+            self.deadlines.schedule(("area_exit", obj.id), obj.last_area_exit.timestamp() + AREA_TIMEOUT_SECONDS)
+
+    def _cleanup_objects(self, now):
+        """
+        Trata só os prazos vencidos (saída da cena, saída da área e presença na área)
+        Cada prazo é reavaliado com o estado atual do objeto: se ainda não venceu, é reagendado
+        """
+        timestamp = now.timestamp()
+        for kind, oid in self.deadlines.pop_due(timestamp):
+            obj = self.active_objects.get(oid)
+            if obj is None:
                 continue
+            if kind == "exit":
+                self._check_exit(obj, now, timestamp)
+            elif kind == "area_exit":
+                self._check_area_exit(obj, now, timestamp)
+            else:
+                self._check_presence(obj, now, timestamp)
 
-            if not obj.is_in_area and obj.last_area_exit:
-                time_outside = now - obj.last_area_exit
-                if time_outside.total_seconds() > AREA_TIMEOUT_SECONDS:
-                    if obj.total_area_time.total_seconds() > 0:
-                        log(1, f"ID: {oid} - {obj.label} saiu da área após {obj.total_area_time.total_seconds():.1f}s")
-                    obj.total_area_time = timedelta(0)
-                    obj.last_area_exit = None
-
-            if obj.is_in_area and obj.area_entry_time:
-                time_in_current_session = now - obj.area_entry_time
-                total_time = time_in_current_session + obj.total_area_time
-                if total_time.total_seconds() > AREA_PRESENCE_THRESHOLD and obj.alerted_level < 2:
-                    log(2, f"ID {oid} - {obj.label} está há {total_time.total_seconds():.1f}s na área! ({now.strftime('%H:%M:%S')})")
-                    obj.alerted_level = 2
-
-    def draw_annotations(self, frame, results, now):
+    def _check_exit(self, obj, now, timestamp):
+        due = obj.last_seen.timestamp() + TIMEOUT_SECONDS
+        if timestamp <= due:
+            # Visto de novo desde o agendamento
+            self.deadlines.schedule(("exit", obj.id), due)
+            return
+
+        oid = obj.id
+        if not obj.logged_exit:
+            log(1, f"ID: {oid} - {obj.label} SAIU às {now.strftime('%H:%M:%S')}",
+                event="exit", entry_time=obj.entry_time, area_time=obj.total_area_time.total_seconds(),
+                speed=obj.last_speed, **self.event_fields(obj, now))
+            if obj.total_area_time.total_seconds() > 0:
+                log(1, f"ID: {oid} - {obj.label} permaneceu {obj.total_area_time.total_seconds():.1f}s na área")
+            if obj.last_speed > 0:
+                log(1, f"ID: {oid} - {obj.label} velocidade média: {obj.last_speed:.1f} km/h")
+            obj.logged_exit = True
+        if obj.is_interested:
+            # Episódio de interesse ainda aberto quando o objeto saiu da cena
+            self.log_interest_end(obj, (now - obj.interest_start_time).total_seconds(), now)
+        if obj.zone_bits:
+            self.log_zone_changes(obj, obj.zone_bits, 0, now)
+        self.track_store.release(obj.slot)
+        del self.active_objects[oid]
+        self.deadlines.cancel(("area_exit", oid))
+        self.deadlines.cancel(("presence", oid))
+
+    def _check_area_exit(self, obj, now, timestamp):
+        if obj.is_in_area or not obj.last_area_exit:
+            return
+        due = obj.last_area_exit.timestamp() + AREA_TIMEOUT_SECONDS
+        if timestamp <= due:
+            self.deadlines.schedule(("area_exit", obj.id), due)
+            return
+
+        if obj.total_area_time.total_seconds() > 0:
+            log(1, f"ID: {obj.id} - {obj.label} saiu da área após {obj.total_area_time.total_seconds():.1f}s",
+                event="area_exit", area_time=obj.total_area_time.total_seconds(), **self.event_fields(obj, now))
+        obj.total_area_time = timedelta(0)
+        obj.last_area_exit = None
+
+    def _check_presence(self, obj, now, timestamp):
+        if not obj.is_in_area or not obj.area_entry_time or obj.alerted_level >= 2:
+            return
+        total_time = (now - obj.area_entry_time) + obj.total_area_time
+        if total_time.total_seconds() <= AREA_PRESENCE_THRESHOLD:
+            self.schedule_area_deadline(obj)
+            return
+
+        log(2, f"ID {obj.id} - {obj.label} está há {total_time.total_seconds():.1f}s na área! ({now.strftime('%H:%M:%S')})",
+            event="area_presence", area_time=total_time.total_seconds(), **self.event_fields(obj, now))
+        self.record_clip("area_presence", obj, now)
+        obj.alerted_level = 2
+
+    def record_clip(self, reason, obj, now):
+        """Grava o clipe do alerta (buffer anterior + próximos segundos) em segundo plano"""
+        if self.clip_recorder is not None:
+            self.clip_recorder.trigger(reason, now.timestamp(), obj.id)
+
+    def draw_annotations(self, frame, detections, now):
         """Desenha anotações no frame"""
-        if not results or len(results) == 0:
-            return frame
-            
-        annotated = results[0].plot()
-        
-        # Desenha área de interesse
-        h, w, _ = frame.shape
-        x1, y1 = int(AREA_X_MIN * w), int(AREA_Y_MIN * h)
-        x2, y2 = int(AREA_X_MAX * w), int(AREA_Y_MAX * h)
-        cv2.rectangle(annotated, (x1, y1), (x2, y2), (255, 0, 0), 2)
-
-        # Desenha linha de entrada da casa
-        entrance_start_x = int(ENTRANCE_LINE_START_X * w)
-        entrance_start_y = int(ENTRANCE_LINE_START_Y * h)
-        entrance_end_x = int(ENTRANCE_LINE_END_X * w)
-        entrance_end_y = int(ENTRANCE_LINE_END_Y * h)
-        cv2.line(
-            annotated,
-            (entrance_start_x, entrance_start_y),
-            (entrance_end_x, entrance_end_y),
-            ENTRANCE_LINE_COLOR,
-            ENTRANCE_LINE_THICKNESS
-        )
+        with metrics.timer("draw_annotations", self.camera_id):
+            return self.renderer.render(frame, detections, self.active_objects, now, self.person_class)
+
+    def report_motion_stats(self):
+        """Registra periodicamente a taxa de frames ignorados pelo filtro de movimento"""
+        if time.time() - self.last_motion_report < MOTION_REPORT_INTERVAL:
+            return
+        self.last_motion_report = time.time()
+        stats = self.motion_gate.get_stats()
+        log(1, f"Filtro de movimento: {stats['skip_rate'] * 100:.1f}% dos frames ignorados | "
+               f"movimento em {stats['hit_rate'] * 100:.1f}% dos frames")
+
+    def get_motion_stats(self):
+        """Retorna estatísticas do filtro de movimento"""
+        if self.motion_gate is None:
+            return None
+        return self.motion_gate.get_stats()
 
-        # Adiciona informações de velocidade e direção
-        for oid, obj in self.active_objects.items():
-            for box in results[0].boxes:
-                # Verifica se o box tem ID e se é válido
-                if box.id is None or len(box.id) == 0:
-                    continue
-                    
-                try:
-                    box_id = int(box.id[0])
-                    if box_id == oid:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        
-                        # Calcula o ponto de referência do objeto
-                        if obj.label == "person":
-                            center_x = (x1 + x2) / 2
-                            height = y2 - y1
-                            center_y = y2 - (height * 0.1)  # 10% acima dos pés
-                        else:
-                            center_x = (x1 + x2) / 2
-                            center_y = (y1 + y2) / 2
-                        
-                        # Verifica interesse na casa
-                        is_looking = obj.check_look_at(w, h)
-                        
-                        # Desenha seta de direção apenas se a velocidade for maior que 1 km/h
-                        if len(obj.position_history) >= 2 and obj.last_speed > 1.0:
-                            arrow_color = LOOK_AT_COLOR if is_looking else ARROW_COLOR
-                            self.draw_direction_arrow(annotated, (center_x, center_y), obj.smoothed_direction, color=arrow_color)
-                        
-                        # Desenha velocidade
-                        speed_text = f"{obj.last_speed:.1f} km/h"
-                        
-                        # Adiciona a distância à linha (sempre mostra)
-                        distance_text = f" [Dist: {obj.last_distance:.2f}]"
-                        speed_text += distance_text
-                        
-                        if obj.is_looking_at:
-                            speed_text += " (Olhando)"
-                        if obj.is_interested:
-                            score_text = f" [Score: {obj.interest_score:.1f}]"
-                            if obj.interest_start_time:
-                                duration = now - obj.interest_start_time
-                                score_text += f" ({duration.total_seconds():.1f}s)"
-                            speed_text += score_text
-                        
-                        # Calcula o tamanho do texto para criar o fundo
-                        font = cv2.FONT_HERSHEY_SIMPLEX
-                        font_scale = 0.6
-                        thickness = 2
-                        (text_width, text_height), _ = cv2.getTextSize(speed_text, font, font_scale, thickness)
-                        
-                        # Desenha o fundo do texto no topo do retângulo
-                        padding = 5
-                        cv2.rectangle(
-                            annotated,
-                            (x1, y1 - text_height - padding * 2 + 30),
-                            (x1 + text_width + padding * 2, y1 + 30),
-                            (0, 0, 0),  # Cor preta para o fundo
-                            -1  # Preenche o retângulo
-                        )
-                        
-                        # Desenha o texto da velocidade no topo
-                        cv2.putText(
-                            annotated,
-                            speed_text,
-                            (x1 + padding, y1 - padding + 30),
-                            font,
-                            font_scale,
-                            (255, 255, 255),  # Cor branca para o texto
-                            thickness
-                        )
-                        break
-                except (ValueError, IndexError):
-                    continue
-
-        return annotated
+    def get_capture_stats(self):
+        """Retorna estatísticas de captura e a latência captura-inferência"""
+        stats = self.capture.get_stats()
+        stats["capture_latency"] = self.capture_latency
+        return stats
 
     def cleanup(self):
         """Limpa recursos"""
-        self.cap.release()
+        self.capture.stop()
+        if self.clip_recorder is not None:
+            self.clip_recorder.stop()
         self.depth_service.cleanup()
         cv2.destroyAllWindows() 
\ No newline at end of file
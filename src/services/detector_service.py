@@ -0,0 +1,349 @@
+import ast
+import glob
+import json
+import os
+import threading
+import cv2
+import numpy as np
+from src.models.detections import Detections
+from src.config.settings import (
+    DETECTOR_MODEL, DETECTOR_CONFIDENCE, DETECTOR_INPUT_SIZE, TRACKER_CONFIG,
+    DETECTOR_BACKEND, DETECTOR_PRECISION, DETECTOR_NMS_IOU, DETECTOR_THREADS
+)
+
+# ultralytics, torch, onnxruntime e openvino são importados apenas quando o modelo/tracker é criado,
+# para que importar este módulo não atrase o início do servidor
+
+
+class YoloDetector:
+    def __init__(self, model_path=DETECTOR_MODEL):
+        """
+        Carrega o modelo YOLO uma única vez
+        A mesma instância pode ser compartilhada por várias câmeras
+        """
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+        # Aceita qualquer tamanho de entrada (o imgsz acompanha o frame)
+        self.input_size = None
+        # O modelo não é thread-safe: as câmeras revezam o acesso
+        self.lock = threading.Lock()
+
+    def detect(self, frame):
+        """
+        Executa a detecção (sem tracking) em um frame
+        Retorna: Detections do frame
+        """
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        """
+        Executa a detecção em vários frames com uma única passada do modelo
+        Retorna: lista de Detections na mesma ordem dos frames
+        """
+        # Os frames já chegam reduzidos pela DetectionService: o imgsz acompanha o maior deles
+        # (múltiplo de 32) para o ultralytics não redimensionar de novo
+        imgsz = int(np.ceil(max(max(frame.shape[:2]) for frame in frames) / 32) * 32)
+        with self.lock:
+            results = self.model.predict(source=frames, conf=DETECTOR_CONFIDENCE, imgsz=imgsz, verbose=False)
+        return [Detections.from_result(result) for result in results]
+
+    def warm_up(self, size=DETECTOR_INPUT_SIZE):
+        """Executa uma inferência em um frame vazio para inicializar o modelo antes do primeiro frame real"""
+        self.detect(np.zeros((size, size, 3), dtype=np.uint8))
+
+    def register_client(self):
+        """Sem efeito: o detector direto não agrupa frames"""
+
+    def unregister_client(self):
+        """Sem efeito: o detector direto não agrupa frames"""
+
+
+def exported_model_path(backend, precision, model_path=DETECTOR_MODEL):
+    """
+    Caminho do modelo exportado para o backend
+    Ex: yolov8n.pt -> yolov8n.onnx, yolov8n_int8.onnx, yolov8n_openvino_model ou yolov8n_int8_openvino_model
+    """
+    base = os.path.splitext(model_path)[0]
+    if precision == "int8":
+        base += "_int8"
+    if backend == "onnxruntime":
+        return f"{base}.onnx"
+    if backend == "openvino":
+        return f"{base}_openvino_model"
+    raise ValueError(f"Backend sem modelo exportado: {backend}")
+
+
+def create_detector(backend=DETECTOR_BACKEND, precision=DETECTOR_PRECISION, model_path=DETECTOR_MODEL):
+    """
+    Cria o detector do backend configurado
+    Todos retornam Detections, então o tracking não depende do backend escolhido
+    """
+    if backend == "ultralytics":
+        if precision != "fp32":
+            raise ValueError("INT8 só está disponível nos backends onnxruntime e openvino")
+        return YoloDetector(model_path)
+
+    path = exported_model_path(backend, precision, model_path)
+    if not os.path.exists(path):
+        int8_flag = " --int8" if precision == "int8" else ""
+        raise FileNotFoundError(
+            f"Modelo {path} não encontrado. Gere com: python src/export_model.py --backend {backend}{int8_flag}"
+        )
+    if backend == "onnxruntime":
+        return OnnxDetector(path)
+    return OpenVinoDetector(path)
+
+
+def letterbox(frame, size):
+    """
+    Redimensiona o frame mantendo a proporção e completa com cinza até size x size
+    Retorna: (imagem, escala, (pad_x, pad_y))
+    """
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+    image = np.full((size, size, 3), 114, dtype=np.uint8)
+    image[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return image, scale, (pad_x, pad_y)
+
+
+def parse_names(names):
+    """Converte os nomes das classes salvos nos metadados do modelo exportado ("{0: 'person', ...}")"""
+    if isinstance(names, str):
+        names = ast.literal_eval(names)
+    return {int(cls): name for cls, name in names.items()}
+
+
+class ExportedYoloDetector:
+    def __init__(self, names, input_size=640, fixed_batch=True,
+                 confidence=DETECTOR_CONFIDENCE, iou=DETECTOR_NMS_IOU):
+        """
+        Base dos detectores que rodam o YOLO exportado (ONNX/OpenVINO) sem PyTorch
+        Faz o letterbox, a decodificação da saída e o NMS com o OpenCV
+        As subclasses implementam apenas _infer(blob)
+        names: nomes das classes {id: nome}
+        input_size: lado da entrada quadrada do modelo
+        fixed_batch: se True, o modelo aceita um frame por inferência
+        """
+        self.names = names
+        self.input_size = input_size
+        self.fixed_batch = fixed_batch
+        self.confidence = confidence
+        self.iou = iou
+        # A sessão é compartilhada entre as câmeras: uma inferência por vez
+        self.lock = threading.Lock()
+
+    def _infer(self, blob):
+        """Executa o modelo; retorna array (batch, 4 + classes, boxes)"""
+        raise NotImplementedError
+
+    def detect(self, frame):
+        """
+        Executa a detecção (sem tracking) em um frame
+        Retorna: Detections do frame
+        """
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        """
+        Executa a detecção em vários frames
+        Retorna: lista de Detections na mesma ordem dos frames
+        """
+        letterboxed = [letterbox(frame, self.input_size) for frame in frames]
+        # BGR HWC uint8 -> RGB NCHW float32 (0-1)
+        blob = cv2.dnn.blobFromImages([image for image, _, _ in letterboxed], 1 / 255.0, swapRB=True)
+
+        with self.lock:
+            if self.fixed_batch:
+                outputs = [self._infer(blob[i:i + 1])[0] for i in range(len(frames))]
+            else:
+                outputs = self._infer(blob)
+
+        return [
+            self._postprocess(output, scale, pad, frame.shape)
+            for output, frame, (_, scale, pad) in zip(outputs, frames, letterboxed)
+        ]
+
+    def _postprocess(self, output, scale, pad, frame_shape):
+        """Decodifica a saída do YOLOv8 (cx, cy, w, h, score por classe) e aplica o NMS por classe"""
+        predictions = output.T
+        scores = predictions[:, 4:]
+        cls = scores.argmax(axis=1)
+        conf = scores[np.arange(len(scores)), cls]
+
+        keep = conf >= self.confidence
+        if not keep.any():
+            return Detections()
+        predictions, cls, conf = predictions[keep], cls[keep], conf[keep]
+
+        # (cx, cy, w, h) -> (x, y, w, h) para o NMS do OpenCV
+        boxes = predictions[:, :4].copy()
+        boxes[:, :2] -= boxes[:, 2:] / 2
+        indices = cv2.dnn.NMSBoxesBatched(boxes, conf, cls.astype(np.int32), self.confidence, self.iou)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        boxes, cls, conf = boxes[indices], cls[indices], conf[indices]
+
+        # Volta para as coordenadas do frame original
+        xyxy = np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=1)
+        xyxy[:, [0, 2]] -= pad[0]
+        xyxy[:, [1, 3]] -= pad[1]
+        xyxy /= scale
+        h, w = frame_shape[:2]
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+        return Detections(xyxy, conf, cls)
+
+    def warm_up(self, size=DETECTOR_INPUT_SIZE):
+        """Executa uma inferência em um frame vazio para inicializar o modelo antes do primeiro frame real"""
+        self.detect(np.zeros((size, size, 3), dtype=np.uint8))
+
+    def register_client(self):
+        """Sem efeito: o detector direto não agrupa frames"""
+
+    def unregister_client(self):
+        """Sem efeito: o detector direto não agrupa frames"""
+
+
+class OnnxDetector(ExportedYoloDetector):
+    def __init__(self, model_path):
+        """YOLO exportado para ONNX rodando no ONNX Runtime (CPU), em fp32 ou INT8"""
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if DETECTOR_THREADS:
+            options.intra_op_num_threads = DETECTOR_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        super().__init__(
+            parse_names(metadata["names"]),
+            input_size=model_input.shape[2] if isinstance(model_input.shape[2], int) else 640,
+            fixed_batch=isinstance(model_input.shape[0], int)
+        )
+
+    def _infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoDetector(ExportedYoloDetector):
+    def __init__(self, model_dir):
+        """YOLO exportado para OpenVINO (pasta *_openvino_model), em fp32 ou INT8"""
+        import openvino as ov
+        import yaml
+
+        core = ov.Core()
+        model = core.read_model(glob.glob(os.path.join(model_dir, "*.xml"))[0])
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if DETECTOR_THREADS:
+            config["INFERENCE_NUM_THREADS"] = DETECTOR_THREADS
+        self.model = core.compile_model(model, "CPU", config)
+        self.output = self.model.output(0)
+
+        with open(os.path.join(model_dir, "metadata.yaml"), 'r') as f:
+            metadata = yaml.safe_load(f)
+        shape = model.inputs[0].partial_shape
+        super().__init__(
+            parse_names(metadata["names"]),
+            input_size=shape[2].get_length() if shape[2].is_static else 640,
+            fixed_batch=shape[0].is_static
+        )
+
+    def _infer(self, blob):
+        return self.model(blob)[self.output]
+
+
+class ObjectTracker:
+    def __init__(self, frame_rate=30, config=TRACKER_CONFIG):
+        """
+        Tracker individual de cada câmera (BoT-SORT ou ByteTrack)
+        Mantém os IDs dos objetos independentes entre as câmeras
+        """
+        from ultralytics.trackers.byte_tracker import BYTETracker
+        from ultralytics.trackers.bot_sort import BOTSORT
+        from ultralytics.utils import IterableSimpleNamespace, yaml_load
+        from ultralytics.utils.checks import check_yaml
+
+        tracker_map = {"bytetrack": BYTETracker, "botsort": BOTSORT}
+        args = IterableSimpleNamespace(**yaml_load(check_yaml(config)))
+        self.tracker = tracker_map[args.tracker_type](args=args, frame_rate=int(frame_rate or 30))
+
+    def update(self, detections, frame):
+        """
+        Associa as detecções do frame aos objetos rastreados
+        Retorna: Detections com os IDs do tracking
+        """
+        if len(detections) == 0:
+            return detections
+
+        tracks = self.tracker.update(detections, frame)
+        if len(tracks) == 0:
+            return detections
+
+        # Cada track: x1, y1, x2, y2, id, confiança, classe, índice da detecção
+        return Detections(tracks[:, :4], tracks[:, 5], tracks[:, 6], tracks[:, 4])
+
+
+class ReplayDetector:
+    def __init__(self, frames, names):
+        """
+        Detector simulado que repete boxes gravados (benchmark sem câmera e sem YOLO)
+        frames: lista com as detecções de cada frame [[x1, y1, x2, y2, conf, cls, id], ...]
+        names: nomes das classes {id: nome}
+        """
+        self.frames = [self._to_detections(boxes) for boxes in frames] or [Detections()]
+        self.names = {int(cls): name for cls, name in names.items()}
+        self.input_size = None
+        self.index = 0
+
+    @staticmethod
+    def _to_detections(boxes):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 7)
+        return Detections(boxes[:, :4], boxes[:, 4], boxes[:, 5], boxes[:, 6])
+
+    @classmethod
+    def from_file(cls, path):
+        """Carrega os boxes gravados pelo benchmark (--record-boxes)"""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(data["frames"], data["names"])
+
+    def seek(self, index):
+        """
+        Posiciona a reprodução no frame index da fonte
+        Frames pulados pelo filtro de movimento não chamam detect(), então o índice
+        precisa seguir o frame capturado e não o número de chamadas
+        """
+        self.index = index
+
+    def detect(self, frame):
+        """Retorna as detecções gravadas do frame atual (volta ao início no fim da gravação)"""
+        detections = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return detections
+
+    def detect_batch(self, frames):
+        return [self.detect(frame) for frame in frames]
+
+    def warm_up(self, size=DETECTOR_INPUT_SIZE):
+        """Sem efeito: não há modelo para aquecer"""
+
+    def register_client(self):
+        """Sem efeito: o detector simulado não agrupa frames"""
+
+    def unregister_client(self):
+        """Sem efeito: o detector simulado não agrupa frames"""
+
+
+class PassthroughTracker:
+    """Tracker simulado: usado quando as detecções gravadas já possuem IDs"""
+
+    def update(self, detections, frame):
+        return detections
+
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import deque
+import cv2
+from src.utils.helpers import log
+from src.utils.metrics import metrics
+from src.config.settings import DISPLAY_HISTORY_SIZE, DISPLAY_IDLE_TIMEOUT
+
+
+class DisplayStream:
+    def __init__(self, source, camera_id=None, history_size=DISPLAY_HISTORY_SIZE, idle_timeout=DISPLAY_IDLE_TIMEOUT):
+        """
+        Stream principal (alta resolução) usado só na exibição do modo dual-stream
+        É aberto quando aparece um cliente e fechado após idle_timeout segundos sem uso,
+        assim o H.264 em resolução cheia só é decodificado quando alguém está assistindo
+        Mantém os últimos frames com o timestamp de captura para o alinhamento com o sub-stream
+        """
+        self.source = source
+        self.camera_id = camera_id
+        self.idle_timeout = idle_timeout
+        self.history = deque(maxlen=history_size)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.last_used = 0.0
+
+    def ensure_running(self):
+        """Marca o stream como em uso e abre a câmera se ainda não estiver aberta"""
+        self.last_used = time.time()
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.history.clear()
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+
+    def _capture_loop(self):
+        """Decodifica o stream principal até ficar sem uso (a conexão é feita aqui para não travar a detecção)"""
+        cap = cv2.VideoCapture(self.source)
+        try:
+            while self.running and time.time() - self.last_used < self.idle_timeout:
+                ret, frame = cap.read()
+                if not ret:
+                    log(1, f"[{self.camera_id}] Erro ao ler o stream principal, exibindo o sub-stream")
+                    break
+                with self.lock:
+                    self.history.append((time.time(), frame))
+        finally:
+            cap.release()
+            with self.lock:
+                self.running = False
+                self.history.clear()
+
+    def frame_at(self, timestamp):
+        """
+        Retorna o frame do stream principal capturado mais perto de timestamp
+        Retorna None enquanto o stream ainda está conectando
+        """
+        with self.lock:
+            if not self.history:
+                return None
+            captured_at, frame = min(self.history, key=lambda item: abs(item[0] - timestamp))
+        metrics.set_gauge("display_offset_seconds", captured_at - timestamp, self.camera_id)
+        return frame
+
+    def stop(self):
+        """Fecha o stream principal"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
@@ -0,0 +1,164 @@
+import json
+import sqlite3
+from datetime import datetime
+from src.config.settings import EVENT_DB_FILE, EVENT_QUERY_MAX_LIMIT
+
+# Campos dos eventos com coluna própria (o restante vai em "data" como JSON)
+COLUMNS = ("camera_id", "track_id", "label", "area_time", "speed", "score", "distance", "entry_time")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    event TEXT NOT NULL,
+    level INTEGER,
+    camera_id TEXT,
+    track_id INTEGER,
+    label TEXT,
+    area_time REAL,
+    speed REAL,
+    score REAL,
+    distance REAL,
+    entry_time REAL,
+    message TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_label_ts ON events (label, ts);
+CREATE INDEX IF NOT EXISTS idx_events_track_ts ON events (track_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_event_ts ON events (event, ts);
+"""
+
+
+def _timestamp(value):
+    """Converte datetime (ou número) em timestamp unix"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def parse_cursor(cursor):
+    """
+    Lê o cursor de paginação "ts:id"
+    Retorna: (ts, id); ValueError se o cursor for inválido
+    """
+    cursor_ts, cursor_id = cursor.split(":")
+    return float(cursor_ts), int(cursor_id)
+
+
+class EventStore:
+    def __init__(self, path=EVENT_DB_FILE):
+        """
+        Histórico de eventos (entradas, saídas, tempo na área, velocidade e interesse) em SQLite
+        As inserções são feitas em lote pela thread do AsyncLogWriter, em uma transação por lote
+        As consultas abrem uma conexão própria (o modo WAL permite ler enquanto grava)
+        """
+        self.path = path
+        self.writer = None
+        connection = self._connect()
+        try:
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    def _connect(self, check_same_thread=True):
+        connection = sqlite3.connect(self.path, timeout=5, check_same_thread=check_same_thread)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    @staticmethod
+    def _to_row(logged_at, level, event, message, fields):
+        values = [_timestamp(fields.get(column)) for column in COLUMNS]
+        extra = {key: _timestamp(value) for key, value in fields.items() if key not in COLUMNS and key != "timestamp"}
+        return (
+            _timestamp(fields.get("timestamp", logged_at)), event, level,
+            *values, message, json.dumps(extra, default=str) if extra else None
+        )
+
+    def insert(self, records):
+        """
+        Insere um lote de eventos em uma única transação
+        records: lista de (logged_at, level, event, message, fields)
+        """
+        if not records:
+            return
+        # A conexão de escrita é usada só pela thread do escritor (close() roda no encerramento)
+        if self.writer is None:
+            self.writer = self._connect(check_same_thread=False)
+        with self.writer:
+            self.writer.executemany(
+                f"INSERT INTO events (ts, event, level, {', '.join(COLUMNS)}, message, data) "
+                f"VALUES ({', '.join('?' * (len(COLUMNS) + 5))})",
+                [self._to_row(*record) for record in records]
+            )
+
+    @staticmethod
+    def _filters(start, end, event, label, camera_id, track_id):
+        conditions, params = [], []
+        for condition, value in (
+            ("ts >= ?", start), ("ts < ?", end), ("event = ?", event),
+            ("label = ?", label), ("camera_id = ?", camera_id), ("track_id = ?", track_id)
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return conditions, params
+
+    def query(self, start=None, end=None, event=None, label=None, camera_id=None, track_id=None,
+              limit=100, cursor=None):
+        """
+        Consulta os eventos do mais recente para o mais antigo
+        start/end: intervalo de tempo (timestamps unix)
+        cursor: valor de next_cursor da página anterior ("ts:id")
+        A paginação usa o próprio índice (ts, id), então páginas antigas custam o mesmo que a primeira
+        Retorna: {"events": [...], "next_cursor": "ts:id" ou None}
+        """
+        limit = max(1, min(int(limit), EVENT_QUERY_MAX_LIMIT))
+        conditions, params = self._filters(start, end, event, label, camera_id, track_id)
+        if cursor:
+            cursor_ts, cursor_id = parse_cursor(cursor)
+            conditions.append("(ts < ? OR (ts = ? AND id < ?))")
+            params += [cursor_ts, cursor_ts, cursor_id]
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                f"SELECT * FROM events {where} ORDER BY ts DESC, id DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        finally:
+            connection.close()
+
+        events = []
+        for row in rows:
+            event_row = dict(row)
+            event_row.update(json.loads(event_row.pop("data") or "{}"))
+            events.append(event_row)
+        next_cursor = f"{rows[-1]['ts']!r}:{rows[-1]['id']}" if len(rows) == limit else None
+        return {"events": events, "next_cursor": next_cursor}
+
+    def stats(self, start=None, end=None, camera_id=None):
+        """
+        Resumo por tipo de evento e classe no intervalo
+        Retorna: lista com event, label, quantidade, tempo médio na área e velocidade média
+        """
+        conditions, params = self._filters(start, end, None, None, camera_id, None)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                f"SELECT event, label, COUNT(*) AS count, AVG(area_time) AS avg_area_time, AVG(speed) AS avg_speed "
+                f"FROM events {where} GROUP BY event, label ORDER BY event, label", params
+            ).fetchall()
+        finally:
+            connection.close()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
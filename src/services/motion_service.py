@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+from src.config.settings import (
+    MOTION_FRAME_WIDTH, MOTION_PIXEL_THRESHOLD, MOTION_MIN_CHANGED_RATIO,
+    MOTION_BACKGROUND_ALPHA, MOTION_HOLD_SECONDS, MOTION_FORCE_INTERVAL,
+    MOTION_TRACKED_INTERVAL
+)
+
+
+class MotionGate:
+    def __init__(self, area):
+        """
+        Filtro barato de movimento executado antes da detecção
+        Compara uma versão reduzida da área de interesse com um fundo adaptativo
+        area: área monitorada (x_min, y_min, x_max, y_max) em percentual
+        """
+        self.area = area
+        self.background = None
+        self.last_motion = None
+        self.last_detection = None
+
+        # Estatísticas
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self.motion_hits = 0
+
+    def _prepare(self, frame):
+        """Recorta a área, reduz a resolução e converte para tons de cinza"""
+        h, w = frame.shape[:2]
+        x_min, y_min, x_max, y_max = self.area
+        crop = frame[int(y_min * h):int(y_max * h), int(x_min * w):int(x_max * w)]
+        if crop.size == 0:
+            crop = frame
+
+        crop_h, crop_w = crop.shape[:2]
+        scale = min(1.0, MOTION_FRAME_WIDTH / crop_w)
+        small = cv2.resize(crop, (max(1, int(crop_w * scale)), max(1, int(crop_h * scale))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def has_motion(self, frame):
+        """Verifica se houve movimento na área desde o fundo acumulado"""
+        gray = self._prepare(frame)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        changed_ratio = np.count_nonzero(diff > MOTION_PIXEL_THRESHOLD) / diff.size
+        cv2.accumulateWeighted(gray, self.background, MOTION_BACKGROUND_ALPHA)
+        return changed_ratio >= MOTION_MIN_CHANGED_RATIO
+
+    def should_detect(self, frame, now, has_active_objects):
+        """
+        Decide se o frame deve passar pela detecção
+        now: timestamp atual em segundos
+        has_active_objects: se existem objetos rastreados (parados, são detectados a cada
+                            MOTION_TRACKED_INTERVAL segundos para manter os rastros vivos)
+        """
+        self.frames_checked += 1
+
+        if self.has_motion(frame):
+            self.motion_hits += 1
+            self.last_motion = now
+
+        recent_motion = self.last_motion is not None and now - self.last_motion <= MOTION_HOLD_SECONDS
+        elapsed = None if self.last_detection is None else now - self.last_detection
+        forced = elapsed is None or elapsed >= MOTION_FORCE_INTERVAL
+
+        if recent_motion or forced or (has_active_objects and elapsed >= MOTION_TRACKED_INTERVAL):
+            self.last_detection = now
+            return True
+
+        self.frames_skipped += 1
+        return False
+
+    def get_stats(self):
+        """Retorna as taxas de frames ignorados e de movimento detectado"""
+        checked = self.frames_checked or 1
+        return {
+            "frames_checked": self.frames_checked,
+            "frames_skipped": self.frames_skipped,
+            "motion_hits": self.motion_hits,
+            "skip_rate": self.frames_skipped / checked,
+            "hit_rate": self.motion_hits / checked,
+        }
@@ -0,0 +1,350 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from src.models.detections import Detections
+from src.config.settings import (
+    CAPTURE_READ_TIMEOUT, FRAME_RING_SLOTS, PROCESS_FRAME_MAX_SIDE, PROCESS_START_TIMEOUT,
+    PROCESS_POLL_INTERVAL, DETECTOR_BACKEND, DETECTOR_PRECISION, DETECTOR_INPUT_SIZE, INFERENCE_MAX_BATCH_SIZE
+)
+
+# Os processos são criados com spawn: fork depois de iniciar threads (Flask, logs) não é seguro
+_context = mp.get_context("spawn")
+
+# Estados de cada slot do anel de frames
+SLOT_FREE, SLOT_WRITING, SLOT_READY, SLOT_READING = 0, 1, 2, 3
+
+
+class SharedFrameRing:
+    def __init__(self, shape, slots, name=None):
+        """
+        Anel de frames em memória compartilhada entre processos
+        Cada slot guarda um frame; o cabeçalho guarda o estado, a sequência e o timestamp de cada slot
+        shape: formato dos frames (altura, largura, 3)
+        name: nome do bloco existente (None cria um novo)
+        """
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.frame_bytes = int(np.prod(self.shape))
+        header_bytes = slots * (1 + 8 + 8)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=self.owner, size=header_bytes + slots * self.frame_bytes
+        )
+
+        buf = self.shm.buf
+        self.states = np.ndarray((slots,), np.int8, buf, offset=0)
+        self.sequences = np.ndarray((slots,), np.int64, buf, offset=slots)
+        self.timestamps = np.ndarray((slots,), np.float64, buf, offset=slots * 9)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, buf, offset=header_bytes)
+        if self.owner:
+            self.states[:] = SLOT_FREE
+            self.sequences[:] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        """Libera as views e o bloco (o dono também remove o bloco do sistema)"""
+        self.states = self.sequences = self.timestamps = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # ainda há frames do anel em uso: o mapeamento é liberado pelo coletor de lixo
+        if self.owner:
+            self.shm.unlink()
+
+
+def _capture_main(source, control, frames_queue, lock, stop_event, slots):
+    """
+    Processo de captura: decodifica o stream direto nos slots do anel
+    Envia apenas (slot, sequência) pela fila; o timestamp fica no cabeçalho do anel
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(source)
+    ret, frame = cap.read() if cap.isOpened() else (False, None)
+    control.send((ret, frame.shape if ret else None, cap.get(cv2.CAP_PROP_FPS)))
+    if not ret:
+        cap.release()
+        return
+
+    ring = SharedFrameRing(frame.shape, slots, name=control.recv())
+    sequence = 0
+    slot = 0
+    try:
+        while not stop_event.is_set():
+            # Próximo slot que não está sendo lido pelo pipeline
+            with lock:
+                while ring.states[slot] == SLOT_READING:
+                    slot = (slot + 1) % slots
+                ring.states[slot] = SLOT_WRITING
+
+            # O frame é decodificado direto na memória compartilhada (sem cópia)
+            ret, decoded = cap.read(ring.frames[slot])
+            if not ret or decoded.shape != ring.shape:
+                break
+            if not np.shares_memory(decoded, ring.frames[slot]):
+                ring.frames[slot] = decoded
+
+            with lock:
+                ring.states[slot] = SLOT_READY
+                ring.sequences[slot] = sequence
+                ring.timestamps[slot] = time.time()
+            try:
+                frames_queue.put_nowait((slot, sequence))
+            except queue.Full:
+                pass  # o pipeline está atrasado: o frame será descartado
+            sequence += 1
+            slot = (slot + 1) % slots
+    finally:
+        frames_queue.put(None)
+        cap.release()
+        ring.close()
+
+
+class SharedMemoryCapture:
+    def __init__(self, source, slots=FRAME_RING_SLOTS):
+        """
+        Captura em um processo próprio, com os frames em um anel de memória compartilhada
+        Mesma interface do CaptureService: o pipeline lê o frame direto do slot, sem cópia
+        O slot lido fica reservado até a próxima leitura
+        """
+        self.source = source
+        self.slots = slots
+        self.lock = _context.Lock()
+        self.stop_event = _context.Event()
+        self.frames_queue = _context.Queue(maxsize=slots * 4)
+        control, child_control = _context.Pipe()
+
+        self.process = _context.Process(
+            target=_capture_main,
+            args=(source, child_control, self.frames_queue, self.lock, self.stop_event, slots),
+            daemon=True
+        )
+        self.process.start()
+
+        self.ring = None
+        self.fps = 0
+        if control.poll(PROCESS_START_TIMEOUT):
+            opened, shape, self.fps = control.recv()
+            if opened:
+                self.ring = SharedFrameRing(shape, slots)
+                control.send(self.ring.name)
+
+        self.reading_slot = None
+        self.failed = False
+
+        # Estatísticas de captura (todo frame capturado e não lido foi descartado)
+        self.frames_captured = 0
+        self.frames_consumed = 0
+
+    def is_opened(self):
+        return self.ring is not None
+
+    def get(self, prop):
+        import cv2
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.ring.shape[0]
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.ring.shape[1]
+        return 0
+
+    def set(self, prop, value):
+        """Stream ao vivo: não há como voltar frames"""
+        return False
+
+    def read_direct(self):
+        """Lê uma cópia do próximo frame (usado na calibração antes do processamento)"""
+        ret, frame, captured_at, timestamp = self.read()
+        return ret, frame.copy() if ret else None
+
+    def start(self):
+        """Sem efeito: o processo de captura já está rodando"""
+
+    def _next_message(self, timeout):
+        """Retorna a mensagem mais recente da fila, descartando as anteriores"""
+        message = self.frames_queue.get(timeout=timeout)
+        while message is not None:
+            try:
+                newer = self.frames_queue.get_nowait()
+            except queue.Empty:
+                break
+            message = newer
+        return message
+
+    def read(self, timeout=CAPTURE_READ_TIMEOUT):
+        """
+        Retorna o frame mais recente (view do slot na memória compartilhada)
+        Retorna: (ret, frame, captured_at, timestamp); câmeras ao vivo usam a hora da captura como relógio
+        """
+        if self.ring is None or self.failed:
+            return False, None, None, None
+
+        deadline = time.time() + timeout
+        while True:
+            try:
+                message = self._next_message(max(0.0, deadline - time.time()))
+            except queue.Empty:
+                return False, None, None, None
+            if message is None:
+                self.failed = True
+                return False, None, None, None
+
+            slot, sequence = message
+            self.frames_captured = sequence + 1
+            with self.lock:
+                # O slot pode ter sido sobrescrito enquanto a mensagem esperava na fila
+                if self.ring.states[slot] != SLOT_READY or self.ring.sequences[slot] != sequence:
+                    continue
+                if self.reading_slot is not None:
+                    self.ring.states[self.reading_slot] = SLOT_FREE
+                self.ring.states[slot] = SLOT_READING
+                self.reading_slot = slot
+                captured_at = float(self.ring.timestamps[slot])
+
+            self.frames_consumed += 1
+            return True, self.ring.frames[slot], captured_at, captured_at
+
+    def get_stats(self):
+        return {
+            "frames_captured": self.frames_captured,
+            "frames_consumed": self.frames_consumed,
+            "frames_dropped": self.frames_captured - self.frames_consumed,
+        }
+
+    def stop(self):
+        """Encerra o processo de captura e libera a memória compartilhada"""
+        self.stop_event.set()
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+def _inference_main(backend, precision, shm_name, slots, slot_bytes, requests, results):
+    """
+    Processo de inferência: lê os frames dos slots e devolve só os arrays das detecções
+    """
+    from src.services.detector_service import create_detector
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        detector = create_detector(backend, precision)
+    except Exception as e:
+        results.put(("error", repr(e)))
+        shm.close()
+        return
+    results.put(("ready", (detector.names, getattr(detector, "input_size", None))))
+
+    while True:
+        shapes = requests.get()
+        if shapes is None:
+            break
+        frames = [
+            np.ndarray(shape, np.uint8, shm.buf, offset=i * slot_bytes)
+            for i, shape in enumerate(shapes)
+        ]
+        try:
+            detections = detector.detect_batch(frames)
+            results.put(("ok", [(d.xyxy, d.conf, d.cls, d.ids) for d in detections]))
+        except Exception as e:
+            results.put(("error", repr(e)))
+        del frames
+    shm.close()
+
+
+class ProcessDetector:
+    def __init__(self, backend=DETECTOR_BACKEND, precision=DETECTOR_PRECISION,
+                 slots=max(1, INFERENCE_MAX_BATCH_SIZE), max_side=PROCESS_FRAME_MAX_SIDE):
+        """
+        Detector rodando em um processo próprio (o modelo não disputa o GIL com o pipeline)
+        Os frames vão por slots de memória compartilhada; pelas filas passam só os formatos
+        e os arrays das detecções
+        slots: máximo de frames por chamada (tamanho do lote)
+        max_side: maior lado aceito para os frames enviados ao detector
+        """
+        self.slots = slots
+        self.slot_bytes = max_side * max_side * 3
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+        self.requests = _context.Queue()
+        self.results = _context.Queue()
+        self.lock = threading.Lock()
+
+        self.process = _context.Process(
+            target=_inference_main,
+            args=(backend, precision, self.shm.name, slots, self.slot_bytes, self.requests, self.results),
+            daemon=True
+        )
+        self.process.start()
+
+        try:
+            status, payload = self._result()
+        except RuntimeError:
+            self.stop()
+            raise
+        if status != "ready":
+            self.stop()
+            raise RuntimeError(f"Erro ao carregar o detector no processo de inferência: {payload}")
+        self.names, self.input_size = payload
+
+    def _result(self):
+        """Aguarda a resposta do processo de inferência, falhando se ele morrer no meio"""
+        while True:
+            try:
+                return self.results.get(timeout=PROCESS_POLL_INTERVAL)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError(f"Processo de inferência encerrou inesperadamente (código {self.process.exitcode})")
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        """
+        Copia os frames para os slots e aguarda as detecções do processo de inferência
+        Retorna: lista de Detections na mesma ordem dos frames
+        """
+        detections = []
+        with self.lock:
+            for start in range(0, len(frames), self.slots):
+                chunk = frames[start:start + self.slots]
+                for i, frame in enumerate(chunk):
+                    if frame.nbytes > self.slot_bytes:
+                        raise ValueError(f"Frame {frame.shape} maior que o slot de inferência (PROCESS_FRAME_MAX_SIDE)")
+                    slot = np.ndarray(frame.shape, np.uint8, self.shm.buf, offset=i * self.slot_bytes)
+                    slot[:] = frame
+                    del slot
+
+                self.requests.put([frame.shape for frame in chunk])
+                status, payload = self._result()
+                if status != "ok":
+                    raise RuntimeError(f"Erro no processo de inferência: {payload}")
+                detections.extend(Detections(*arrays) for arrays in payload)
+        return detections
+
+    def warm_up(self, size=DETECTOR_INPUT_SIZE):
+        """Executa uma inferência em um frame vazio para inicializar o modelo antes do primeiro frame real"""
+        self.detect(np.zeros((size, size, 3), dtype=np.uint8))
+
+    def register_client(self):
+        """Sem efeito: o detector direto não agrupa frames"""
+
+    def unregister_client(self):
+        """Sem efeito: o detector direto não agrupa frames"""
+
+    def stop(self):
+        """Encerra o processo de inferência e libera a memória compartilhada"""
+        self.requests.put(None)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.shm.close()
+        self.shm.unlink()
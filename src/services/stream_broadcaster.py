@@ -0,0 +1,66 @@
+import threading
+import cv2
+from src.utils.metrics import metrics
+from src.config.settings import STREAM_JPEG_QUALITY, STREAM_WAIT_TIMEOUT
+
+
+class FrameBroadcaster:
+    def __init__(self, quality=STREAM_JPEG_QUALITY, camera_id=None):
+        """
+        Distribui o stream MJPEG para vários clientes
+        Cada frame novo é codificado em JPEG uma única vez e compartilhado por todos
+        Clientes lentos pulam direto para o frame mais recente (sem fila)
+        camera_id: identificador da câmera usado nas métricas
+        """
+        self.camera_id = camera_id
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        self.condition = threading.Condition()
+        self.jpeg = None
+        self.sequence = 0
+        self.clients = 0
+
+    def has_clients(self):
+        """Indica se há clientes conectados ao stream"""
+        return self.clients > 0
+
+    def publish(self, frame):
+        """Codifica o frame anotado e acorda os clientes aguardando"""
+        # Sem clientes conectados não há por que gastar CPU com a codificação
+        if not self.has_clients():
+            return
+
+        with metrics.timer("jpeg_encode", self.camera_id):
+            ret, buffer = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ret:
+            return
+
+        with self.condition:
+            self.jpeg = buffer.tobytes()
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def wait_for_frame(self, last_sequence, timeout=STREAM_WAIT_TIMEOUT):
+        """
+        Aguarda um frame mais novo que last_sequence
+        Retorna: (sequence, jpeg) — sequence igual a last_sequence se o tempo esgotar
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence != last_sequence, timeout)
+            return self.sequence, self.jpeg
+
+    def stream(self):
+        """Gerador multipart/x-mixed-replace para a resposta HTTP"""
+        with self.condition:
+            self.clients += 1
+        try:
+            last_sequence = self.sequence
+            while True:
+                sequence, jpeg = self.wait_for_frame(last_sequence)
+                if sequence == last_sequence or jpeg is None:
+                    continue
+                last_sequence = sequence
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        finally:
+            with self.condition:
+                self.clients -= 1
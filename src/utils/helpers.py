@@ -1,15 +1,9 @@
 import math
-from datetime import datetime
-from src.config.settings import LOG_LEVEL
-import os
+import threading
+from src.config.settings import LOG_LEVEL, LOG_FILE, EVENT_DB_ENABLED
 
-LOG_FILE = 'gatekeeperx.log'
-
-# Zera o arquivo de log ao iniciar o servidor
-if os.path.exists(LOG_FILE):
-    with open(LOG_FILE, 'w') as f:
-        f.write('')
-else:
+def reset_log_file():
+    """Zera o arquivo de log (chamado explicitamente ao iniciar o servidor)"""
     with open(LOG_FILE, 'w') as f:
         f.write('')
 
@@ -57,21 +51,44 @@ def pixels_to_meters(pixels_per_second, frame_width, y_position, frame_height, c
     meters_per_pixel = (REAL_WIDTH_METERS / frame_width) * adjusted_calibration
     return pixels_per_second * meters_per_pixel
 
-def log(level, message):
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+def get_log_writer():
+    """Retorna o escritor de logs em segundo plano (criado no primeiro uso, uma única vez entre as câmeras)"""
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                from src.utils.log_writer import AsyncLogWriter
+                _log_writer = AsyncLogWriter(event_store=get_event_store())
+    return _log_writer
+
+_event_store = None
+_event_store_lock = threading.Lock()
+
+def get_event_store():
+    """Retorna o histórico de eventos em SQLite (None se desativado em EVENT_DB_ENABLED)"""
+    global _event_store
+    if _event_store is None and EVENT_DB_ENABLED:
+        with _event_store_lock:
+            if _event_store is None:
+                from src.services.event_store import EventStore
+                _event_store = EventStore()
+    return _event_store
+
+def log(level, message, event=None, **fields):
     """
     Exibe e registra logs do sistema.
+    A escrita acontece em uma thread de fundo: esta função apenas enfileira o registro.
     level: nível do log (0=debug, 1=info, 2=alerta)
     message: mensagem a ser exibida
+    event: tipo do evento estruturado (ex: "entry", "exit", "interest"), gravado em JSONL
+    fields: campos do evento estruturado (camera_id, track_id, label, score, ...)
     """
-    if level >= LOG_LEVEL:
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_line = f"[{timestamp}] {message}"
-        print(log_line)
-        # Só registra logs de nível 2
-        if level == 2:
-            with open(LOG_FILE, 'a') as f:
-                f.write(log_line + '\n')
-            print('\a', end='', flush=True)  # Bip para todos os logs nível 2
+    if level < LOG_LEVEL and event is None:
+        return
+    get_log_writer().write(level, message, event, fields)
 
 def format_time(dt):
     """Formata datetime para string legível"""
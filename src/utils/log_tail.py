@@ -0,0 +1,54 @@
+import os
+
+# Tamanho do bloco lido de trás para frente ao buscar as últimas linhas
+TAIL_BLOCK_SIZE = 8192
+
+
+def read_lines_from(path, offset, limit):
+    """
+    Lê no máximo limit linhas completas a partir do byte offset
+    Se o arquivo encolheu (log zerado ao reiniciar), recomeça do início
+    Retorna: (linhas, offset logo após a última linha lida)
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        if offset > size:
+            offset = 0
+        f.seek(offset)
+
+        lines = []
+        while len(lines) < limit:
+            line = f.readline()
+            # Linha ainda sendo escrita: fica para a próxima leitura
+            if not line.endswith(b'\n'):
+                break
+            lines.append(line.decode('utf-8', errors='replace').rstrip('\n'))
+            offset += len(line)
+    return lines, offset
+
+
+def read_last_lines(path, limit):
+    """
+    Lê as últimas limit linhas completas sem carregar o arquivo inteiro
+    Retorna: (linhas, offset do fim da última linha)
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        data = b''
+        position = end
+        # Lê blocos do fim para o início até ter linhas suficientes
+        while position > 0 and data.count(b'\n') <= limit:
+            block = min(TAIL_BLOCK_SIZE, position)
+            position -= block
+            f.seek(position)
+            data = f.read(block) + data
+
+    # Descarta a linha incompleta no fim e as que sobraram no começo
+    complete = data[:data.rfind(b'\n') + 1]
+    end_offset = position + len(complete)
+    lines = complete.decode('utf-8', errors='replace').splitlines()
+    return lines[-limit:] if limit > 0 else [], end_offset
@@ -0,0 +1,205 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from src.config.settings import (
+    LOG_LEVEL, LOG_FILE, EVENT_LOG_FILE, EVENT_LOG_MAX_BYTES,
+    EVENT_LOG_BACKUP_COUNT, LOG_WRITER_BATCH_SIZE, LOG_STREAM_QUEUE_SIZE
+)
+
+
+def _json_default(value):
+    """Serializa valores que o json não conhece (datetime, numpy, ...)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class RotatingFile:
+    def __init__(self, path, max_bytes, backup_count):
+        """Arquivo em modo append que é rotacionado ao atingir max_bytes"""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.file = None
+        self.size = 0
+
+    def _open(self):
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.size = self.file.tell()
+
+    def _rotate(self):
+        """Renomeia arquivo -> arquivo.1 -> arquivo.2 ... descartando o mais antigo"""
+        self.file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write(self, data):
+        if self.file is None:
+            self._open()
+        size = len(data.encode('utf-8'))
+        if self.max_bytes > 0 and self.size > 0 and self.size + size > self.max_bytes:
+            self._rotate()
+        self.file.write(data)
+        self.size += size
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class AsyncLogWriter:
+    def __init__(self, log_file=LOG_FILE, event_file=EVENT_LOG_FILE, event_store=None):
+        """
+        Escreve os logs em uma thread de fundo
+        O loop de detecção apenas enfileira os registros e nunca espera por disco ou terminal
+        Os registros acumulados são escritos em lote a cada iteração
+        event_store: EventStore que recebe os eventos estruturados (uma transação por lote)
+        """
+        self.log_file = log_file
+        self.event_store = event_store
+        # Filas dos clientes que acompanham os alertas em tempo real (/logs/stream)
+        self.listeners = []
+        self.listeners_lock = threading.Lock()
+        self.events = RotatingFile(event_file, EVENT_LOG_MAX_BYTES, EVENT_LOG_BACKUP_COUNT)
+        self.queue = queue.SimpleQueue()
+        # Depois que close() começa, novos registros são descartados
+        self.closing = False
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, level, message, event=None, fields=None):
+        """Enfileira um registro de log (não bloqueia)"""
+        if self.closing:
+            return
+        self.queue.put((datetime.now(), level, message, event, fields or {}))
+
+    def subscribe(self):
+        """
+        Registra um ouvinte dos novos alertas
+        Retorna: fila que recebe (offset do fim da linha no arquivo, linha)
+        """
+        listener = queue.Queue(maxsize=LOG_STREAM_QUEUE_SIZE)
+        with self.listeners_lock:
+            self.listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        with self.listeners_lock:
+            self.listeners.remove(listener)
+
+    def _notify(self, lines):
+        """Entrega as linhas gravadas aos ouvintes sem nunca bloquear a escrita"""
+        with self.listeners_lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            for line in lines:
+                try:
+                    listener.put_nowait(line)
+                except queue.Full:
+                    # Cliente lento: perde a linha, mas pode recuperá-la por /logs/tail
+                    break
+
+    def _drain(self, first):
+        """Coleta o primeiro registro e os que já estiverem na fila"""
+        batch = [first]
+        while len(batch) < LOG_WRITER_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _writer_loop(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+
+            batch = self._drain(record)
+            stop = any(record is None for record in batch)
+            self._write_batch([record for record in batch if record is not None])
+            if stop:
+                break
+
+    def _write_batch(self, batch):
+        """Escreve um lote no terminal, no log de alertas e no log de eventos"""
+        console_lines = []
+        alert_lines = []
+        event_lines = []
+        event_records = []
+        for logged_at, level, message, event, fields in batch:
+            if level >= LOG_LEVEL:
+                log_line = f"[{logged_at.strftime('%H:%M:%S')}] {message}"
+                console_lines.append(log_line)
+                # Só registra no arquivo os logs de nível 2
+                if level == 2:
+                    alert_lines.append(log_line)
+
+            if event is not None:
+                record = {"logged_at": logged_at, "level": level, "event": event, "message": message}
+                record.update(fields)
+                event_lines.append(json.dumps(record, default=_json_default, ensure_ascii=False) + '\n')
+                event_records.append((logged_at, level, event, message, fields))
+
+        try:
+            if console_lines:
+                sys.stdout.write('\n'.join(console_lines) + '\n')
+            if alert_lines:
+                self._write_alerts(alert_lines)
+                sys.stdout.write('\a')  # Bip para os logs nível 2
+            sys.stdout.flush()
+            for line in event_lines:
+                self.events.write(line)
+            self.events.flush()
+        except OSError as e:
+            sys.stderr.write(f"Erro ao escrever logs: {e}\n")
+
+        if self.event_store is not None:
+            try:
+                self.event_store.insert(event_records)
+            except sqlite3.Error as e:
+                sys.stderr.write(f"Erro ao gravar eventos no banco: {e}\n")
+
+    def _write_alerts(self, alert_lines):
+        """Acrescenta os alertas ao arquivo e avisa os ouvintes com o offset de cada linha"""
+        encoded = [(line + '\n').encode('utf-8') for line in alert_lines]
+        with open(self.log_file, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(b''.join(encoded))
+
+        if self.listeners:
+            lines = []
+            for line, data in zip(alert_lines, encoded):
+                offset += len(data)
+                lines.append((offset, line))
+            self._notify(lines)
+
+    def close(self):
+        """Escreve os registros pendentes e encerra a thread"""
+        self.closing = True
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=2)
+        self.events.close()
+        if self.event_store is not None:
+            self.event_store.close()
@@ -0,0 +1,128 @@
+import bisect
+import threading
+import time
+import numpy as np
+from src.config.settings import METRICS_BUCKETS, METRICS_WINDOW_SIZE, METRICS_PREFIX
+
+
+class RollingHistogram:
+    def __init__(self, buckets=METRICS_BUCKETS, window_size=METRICS_WINDOW_SIZE):
+        """
+        Histograma de latências
+        Mantém os contadores acumulados por faixa (formato Prometheus) e as
+        últimas window_size amostras para calcular os percentis recentes
+        """
+        self.buckets = list(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.window = np.zeros(window_size)
+        self.window_index = 0
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.window[self.window_index % len(self.window)] = value
+        self.window_index += 1
+
+    def quantiles(self, quantiles=(0.5, 0.95, 0.99)):
+        """Percentis das últimas amostras"""
+        samples = self.window[:min(self.window_index, len(self.window))]
+        if len(samples) == 0:
+            return {q: 0.0 for q in quantiles}
+        return dict(zip(quantiles, np.quantile(samples, quantiles)))
+
+
+class StageTimer:
+    def __init__(self, registry, stage, camera):
+        self.registry = registry
+        self.stage = stage
+        self.camera = camera
+        self.started_at = 0.0
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.started_at, self.camera)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self, prefix=METRICS_PREFIX):
+        """Registro central de histogramas, contadores e medidores (gauges) por câmera"""
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def timer(self, stage, camera=None):
+        """Mede a duração de um estágio: with metrics.timer("inference", camera_id): ..."""
+        return StageTimer(self, stage, camera)
+
+    def observe(self, stage, seconds, camera=None):
+        """Registra a duração (segundos) de um estágio"""
+        key = (stage, str(camera or "default"))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = RollingHistogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, camera=None, value=1):
+        """Incrementa um contador"""
+        key = (name, str(camera or "default"))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_counter(self, name, value, camera=None):
+        """Define o valor absoluto de um contador mantido por outro componente"""
+        with self.lock:
+            self.counters[(name, str(camera or "default"))] = value
+
+    def set_gauge(self, name, value, camera=None):
+        """Define o valor de um medidor"""
+        with self.lock:
+            self.gauges[(name, str(camera or "default"))] = value
+
+    def render_prometheus(self):
+        """Exporta todas as métricas no formato texto do Prometheus"""
+        lines = []
+        with self.lock:
+            histogram_name = f"{self.prefix}_stage_duration_seconds"
+            window_name = f"{self.prefix}_stage_duration_recent_seconds"
+            if self.histograms:
+                lines.append(f"# HELP {histogram_name} Duração de cada estágio do pipeline")
+                lines.append(f"# TYPE {histogram_name} histogram")
+                for (stage, camera), histogram in sorted(self.histograms.items()):
+                    labels = f'stage="{stage}",camera="{camera}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                        cumulative += count
+                        lines.append(f'{histogram_name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{histogram_name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{histogram_name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{histogram_name}_count{{{labels}}} {histogram.count}")
+
+                lines.append(f"# HELP {window_name} Percentis da duração dos estágios nas últimas amostras")
+                lines.append(f"# TYPE {window_name} gauge")
+                for (stage, camera), histogram in sorted(self.histograms.items()):
+                    for quantile, value in histogram.quantiles().items():
+                        lines.append(f'{window_name}{{stage="{stage}",camera="{camera}",quantile="{quantile}"}} {value}')
+
+            for metrics, metric_type in ((self.counters, "counter"), (self.gauges, "gauge")):
+                for name in sorted({name for name, camera in metrics}):
+                    full_name = f"{self.prefix}_{name}"
+                    lines.append(f"# TYPE {full_name} {metric_type}")
+                    for (metric_name, camera), value in sorted(metrics.items()):
+                        if metric_name == name:
+                            lines.append(f'{full_name}{{camera="{camera}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+
+# Registro global usado por todo o pipeline
+metrics = MetricsRegistry()
@@ -0,0 +1,43 @@
+import heapq
+import itertools
+
+
+class DeadlineScheduler:
+    def __init__(self):
+        """
+        Agenda de prazos (min-heap ordenado pelo horário de vencimento)
+        Cada chave tem no máximo um prazo válido; prazos substituídos ficam no heap
+        e são descartados quando chegam ao topo
+        O prazo agendado pode ser anterior ao real: quem trata o vencimento reavalia o estado
+        e reagenda a chave se ainda não for a hora
+        """
+        self.heap = []
+        self.deadlines = {}
+        self.counter = itertools.count()
+
+    def schedule(self, key, due):
+        """Agenda a chave para due (timestamp); mantém o prazo mais próximo se já houver um"""
+        current = self.deadlines.get(key)
+        if current is not None and current <= due:
+            return
+        self.deadlines[key] = due
+        heapq.heappush(self.heap, (due, next(self.counter), key))
+
+    def cancel(self, key):
+        """Remove o prazo da chave (a entrada no heap é descartada depois)"""
+        self.deadlines.pop(key, None)
+
+    def pop_due(self, now):
+        """Retorna as chaves vencidas (due < now) na ordem de vencimento"""
+        due_keys = []
+        while self.heap and self.heap[0][0] < now:
+            due, _, key = heapq.heappop(self.heap)
+            # Entrada substituída ou cancelada
+            if self.deadlines.get(key) != due:
+                continue
+            del self.deadlines[key]
+            due_keys.append(key)
+        return due_keys
+
+    def __len__(self):
+        return len(self.deadlines)
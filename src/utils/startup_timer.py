@@ -0,0 +1,38 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    def __init__(self):
+        """Mede o tempo de cada fase da inicialização do serviço"""
+        self.started_at = time.perf_counter()
+        self.phases = []
+
+    def elapsed(self):
+        """Tempo em segundos desde o início"""
+        return time.perf_counter() - self.started_at
+
+    @contextmanager
+    def phase(self, name):
+        """Mede a duração de uma fase: with timer.phase("modelo"): ..."""
+        start = self.elapsed()
+        try:
+            yield
+        finally:
+            self.phases.append({"name": name, "start": start, "duration": self.elapsed() - start})
+
+    def mark(self, name):
+        """Registra um marco instantâneo (ex: servidor HTTP no ar)"""
+        self.phases.append({"name": name, "start": self.elapsed(), "duration": 0.0})
+
+    def report(self):
+        """Retorna o relatório em formato de dicionário"""
+        return {"total": self.elapsed(), "phases": list(self.phases)}
+
+    def format_report(self):
+        """Retorna o relatório em texto, uma fase por linha"""
+        lines = ["Tempo de inicialização:"]
+        for phase in self.phases:
+            lines.append(f"  {phase['name']:<20} +{phase['start']:7.2f}s  {phase['duration']:7.2f}s")
+        lines.append(f"  {'total':<20} {self.elapsed():8.2f}s")
+        return "\n".join(lines)